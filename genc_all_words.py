@@ -8,57 +8,31 @@ from wordgames import Word, WordList, AnagramsDict, LetterSetBitmask
 import sys
 import os.path
 from copy import deepcopy
+# The lexicon module lives with the pangram scripts.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pangrams'))
+from pangram_lexicon import Lexicon, sorted_letters
 
 if __name__ == "__main__":
     # The given word list file should contain all 5L words desired to search
     # to validate the pangrams from the pangrams list file.
+    # The lexicon of the word list numbers the words the same way as the C Wordle
+    # word lists: we offset the "natural" C index by one, so that word index zero
+    # can be used as the "null" word. So the first word has index one.
     ALL_WORDS_FILE = "ALL"
-    print("Reading word list:", ALL_WORDS_FILE, file=sys.stderr, flush=True)
-    all_words = WordList.from_file(ALL_WORDS_FILE)
-    all_words.sort()
+    print("Loading lexicon of word list:", ALL_WORDS_FILE, file=sys.stderr, flush=True)
+    lexicon = Lexicon.open(ALL_WORDS_FILE)
+    records = lexicon.records
+    word2index = lexicon.word2index
 
-    # Build a helper dict with the word as the key, and the word index
-    # as the value. For the C Wordle word lists, we offset the "natural"
-    # C index by one, so that word index zero can be used as the "null"
-    # word. So the first word has index one.
-    word2index = dict()
-    index: int = 1
-    for w in all_words.word_list:
-        word2index[w.word] = index
-        index += 1
-    
     # We can prune all but one of any sets of anagrammatic words.
     # Any pangrams found for one anagram work with all anagrams.
     # JUST REMEMBER TO CHECK FOR ANAGRAMS AT THE END TO PRINT
     # THOSE OUT AS PART OF THE FINAL RESULTS! THEY COUNT AS
     # DISTINCT SOLUTIONS even if we don't need to waste time
     # representing them as separate nodes in the search space.
-    anagrams_dict = AnagramsDict()
-    anagrams_dict.add_wordlist(all_words)
-    anagrams_dict.prune() # Remove entries with just one anagram, i.e. the root word
-    anagrams_dict.sort() # Sort the lists of anagrams within the dict for consistent results
-
-    """
-    # Find and print the longest list of anagrams
-    longest: int = 0
-    long_k = None
-    long_v = None
-    for k,v in anagrams_dict.anagrams.items():
-        if len(v) > longest:
-            longest = len(v)
-            long_k = k
-            long_v = v
-    print("Most anagrams: n=", longest, "k=", long_k, "v=", long_v, file=sys.stderr, flush=True)
-    """
-    
-    # Start with a copy of all the given words.
-    # Then remove all but the first anagram listed for each entry in the anagrams dict.
-    # The resulting list contains no anagrams of any of the words in the list.
-    no_anagrams = deepcopy(all_words)
-    for agrams in anagrams_dict.anagrams.values():
-        for wordstr in agrams[1:]:
-            no_anagrams.remove_str(wordstr)
-    no_anagrams.sort()
+    # The lexicon's anagram classes are numbered in sorted order of their letters.
+    anagram_sets = lexicon.anagram_sets()
+    no_anagrams = lexicon.no_anagrams()
     
     OUT_FILE = "all_words.inl"
     if os.path.isfile(OUT_FILE):
@@ -66,26 +40,24 @@ if __name__ == "__main__":
 
     with open(OUT_FILE, 'w') as outf:
         print('#include "wordle.h"\n', file=outf)
-        print(f'#define N_WORDS {len(all_words)}\n', file=outf)
+        print(f'#define N_WORDS {len(lexicon)}\n', file=outf)
         print('WordleWord ALL_WORDS[N_WORDS+1] = {\n  {}, // used as a flag value for the NULL word or no-word WORD_NUM==0', file=outf)
         i: int = 0
-        for w in all_words.word_list:
+        for w in lexicon.words:
             i += 1
-            print(f'  /* {i} */ {{"{w.word}"', end='', file=outf)
-            print(f',"{w.sorted_letters()}"', end='', file=outf)
-            print(f',{w.letter_set_mask}', end='', file=outf)
-            print(f',{len(w.letter_set)}', end='', file=outf)
+            print(f'  /* {i} */ {{"{w}"', end='', file=outf)
+            print(f',"{sorted_letters(w)}"', end='', file=outf)
+            print(f',{records["mask"][i]}', end='', file=outf)
+            print(f',{records["n_letters"][i]}', end='', file=outf)
             print('},', file=outf)
         print('};', file=outf)
         
         print('', file=outf)
 
-        print(f'#define N_ANAGRAMS {len(anagrams_dict)}\n', file=outf)
+        print(f'#define N_ANAGRAMS {len(anagram_sets)}\n', file=outf)
         print('WordleAnagram ANAGRAMS[N_ANAGRAMS+1] = {\n  {}, // used as a flag to indicate the NULL anagram or no-anagrams', file=outf)
-        keys = sorted(anagrams_dict.anagrams.keys())
-        for k in keys:
-            v = anagrams_dict.anagrams[k]
-            print(f'  {{"{k}"', end='', file=outf)
+        for v in anagram_sets:
+            print(f'  {{"{sorted_letters(v[0])}"', end='', file=outf)
             print(f',{len(v)}', end='', file=outf)
             print(',{', end='', file=outf)
             lastw = v[-1]
@@ -100,8 +72,44 @@ if __name__ == "__main__":
         
         print(f'#define N_NO_ANAGRAMS {len(no_anagrams)}\n', file=outf)
         print('uint16_t NO_ANAGRAMS[N_NO_ANAGRAMS] = {', file=outf)
-        for w in no_anagrams.word_list:
-            print(f'  {word2index[w.word]}, // {w.word}', file=outf)
+        for w in no_anagrams:
+            print(f'  {word2index[w]}, // {w}', file=outf)
+        print('};', file=outf)
+
+        print('', file=outf)
+
+        # Index tables for searchers that branch on the rarest letter not yet covered:
+        # for each letter, the positions in NO_ANAGRAMS (the w of WORDS[w] in the searchers)
+        # of the words containing that letter, in ascending order. The tables are stored
+        # back to back in NO_ANAGRAMS_BY_LETTER, and the bucket of letter L (0 for A) is
+        # from NO_ANAGRAMS_BY_LETTER_START[L] up to NO_ANAGRAMS_BY_LETTER_START[L+1].
+        # LETTERS_BY_RARITY lists the letters by the size of their bucket, smallest first.
+        no_anagrams_masks = [int(records["mask"][word2index[w]]) for w in no_anagrams]
+        buckets = [[i for (i, m) in enumerate(no_anagrams_masks) if m & (1 << letter)] for letter in range(26)]
+        starts = [0]
+        for bucket in buckets:
+            starts.append(starts[-1] + len(bucket))
+        print(f'#define N_NO_ANAGRAMS_BY_LETTER {starts[-1]}\n', file=outf)
+        print('uint16_t NO_ANAGRAMS_BY_LETTER[N_NO_ANAGRAMS_BY_LETTER] = {', file=outf)
+        for (letter, bucket) in enumerate(buckets):
+            print(f'  // {chr(ord("A") + letter)}: {len(bucket)} words', file=outf)
+            for j in range(0, len(bucket), 16):
+                print('  ' + ','.join([str(i) for i in bucket[j:j+16]]) + ',', file=outf)
+        print('};', file=outf)
+
+        print('', file=outf)
+
+        print('uint32_t NO_ANAGRAMS_BY_LETTER_START[26+1] = {', file=outf)
+        for (letter, start) in enumerate(starts):
+            letter_name = chr(ord("A") + letter) if letter < 26 else 'end'
+            print(f'  {start}, // {letter_name}', file=outf)
+        print('};', file=outf)
+
+        print('', file=outf)
+
+        rarity = sorted(range(26), key=lambda letter: (len(buckets[letter]), letter))
+        print('uint8_t LETTERS_BY_RARITY[26] = {', file=outf)
+        print('  ' + ','.join([str(letter) for letter in rarity]) + ', // ' + ''.join([chr(ord("A") + letter) for letter in rarity]), file=outf)
         print('};', file=outf)
         
        
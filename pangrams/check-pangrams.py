@@ -2,159 +2,242 @@
 # Copyright (C) 2024 Dez Moleski dez@moleski.com
 # MIT License: All uses allowed with attribution.
 #
-from wordgames import Word, WordList, AnagramsDict, LetterSetBitmask
+# Checks pangrams lists against a word list, and prints the valid pangrams
+# without duplicates, with the anagrams of their words.
+#
+# Given several pangrams lists (e.g. all the outputs of a searcher run) they
+# are checked together in parallel worker processes, and a pangram repeated in
+# any of them is a duplicate, even if the copies are in different files. Each
+# worker spills the keys of its file's pangrams into shared shards partitioned
+# by key hash, then the shards are checked for duplicates in parallel, then
+# the files are reported on and printed in order, ending with a global report.
+#
 import sys
-from copy import deepcopy
-import datetime
-import json
+import os
 import os.path
+import io
+import tempfile
+from pangram_lexicon import Lexicon
+from pangram_keys import (ALL_LETTERS, MEMORY_BUDGET, N_PARTITIONS, DuplicateFinder,
+                          pangram_key, file_position, split_position, partition_duplicates)
+from pangram_scan import scan, processes_arg
 
-def sorted_letters(s: set) -> str:
-   l = list(s)
-   l.sort()
-   return ''.join(l)
+USAGE = "Usage: check-pangrams [-j processes] [-m megabytes] word-list pangrams-list ..."
 
+# Outcomes of checking a line of six words
+PANGRAM = 0
+SOME_WORDS_NOT_FOUND = 1
+NOT_A_PANGRAM = 2
 
-def sorted_words_str(words: list, mutable: bool) -> str:
-   '''Words is a list of strings. Mutable tells us if we must copy before sorting.'''
-   # Put the given list into a canonical form that we can
-   # use to recognize whether it's just a permutation of a
-   # list that we've already seen.
-   if not mutable:
-      mutable_list = words.copy() # We're not allowed to modify the given list!
-   else:
-      mutable_list = words
-   mutable_list.sort()
-   return ' '.join(mutable_list)
+def check_line(line_list: list, word2index: dict, masks: list) -> (int,list):
+   '''Check a line of six words. Returns (outcome, the word indices), or the word not found.'''
+   indices = list()
+   letter_mask = 0
+   for w in line_list:
+      i = word2index.get(w)
+      if i is None:
+         return (SOME_WORDS_NOT_FOUND, w)
+      indices.append(i)
+      letter_mask |= masks[i]
+   if letter_mask != ALL_LETTERS:
+      return (NOT_A_PANGRAM, indices)
+   return (PANGRAM, indices)
+
+def collect_keys(filepath: str, finder: DuplicateFinder, word2index: dict, masks: list, file_number: int = 0):
+   '''First pass: add the key of each valid pangram in the file to the finder, by position.'''
+   with open(filepath, 'r') as f:
+      for (line_number, line) in enumerate(f):
+         line_list = line.split()
+         if len(line_list) == 6:
+            (outcome, indices) = check_line(line_list, word2index, masks)
+            if outcome == PANGRAM:
+               finder.add(pangram_key(indices), file_position(file_number, line_number))
+
+def report_file(filepath: str, lexicon: Lexicon, masks: list, duplicates, out, err,
+                file_number: int = 0, file_paths: list = None) -> dict:
+   '''Second pass: report the bad lines of the file to err and print the kept lines to out.
+   duplicates holds the positions of the duplicate lines; when checking several files
+   (file_paths given) it maps each of them to the position of the pangram's first copy.
+   Returns the counts of each kind of line.
+   '''
+   counts = {'counts_lines': 0, 'pangrams': 0, 'duplicates': 0, 'duplicates_across': 0,
+             'not_pangrams': 0, 'words_not_found': 0, 'n_total': 0}
+   prefix = '' if file_paths is None else filepath + ': '
+   with open(filepath, 'r') as f:
+      for (line_number, line) in enumerate(f):
+         line_list = line.split()
+         if len(line_list) == 4 and line_list[0] == '#':
+            # This looks like a counts line
+            counts['counts_lines'] += 1
+            (anagrams, n_anagrams) = lexicon.format_anagrams(line_list[1])
+            if n_anagrams == 1:
+               print(line.rstrip(), file=out)
+            else:
+               print(f'# {anagrams} = {line_list[3]}', file=out)
+         elif len(line_list) == 6:
+            # OK, we have a line of six strings separated by whitespace.
+            (outcome, checked) = check_line(line_list, lexicon.word2index, masks)
+            position = file_position(file_number, line_number)
+            if outcome == SOME_WORDS_NOT_FOUND:
+               counts['words_not_found'] += 1
+               print(prefix + "!WORD NOT FOUND:", checked, file=err, flush=True)
+               print(prefix + "!SOME WORDS NOT FOUND:", line, end='', file=err, flush=True)
+            elif outcome == NOT_A_PANGRAM:
+               counts['not_pangrams'] += 1
+               print(prefix + "!NOT A PANGRAM:", line, end='', file=err, flush=True)
+            elif position in duplicates:
+               counts['duplicates'] += 1
+               if file_paths is None:
+                  print("!DUPLICATE:", line, end='', file=err, flush=True)
+               else:
+                  (first_file, first_line) = split_position(duplicates[position])
+                  if first_file != file_number:
+                     counts['duplicates_across'] += 1
+                  print(f'{prefix}!DUPLICATE of {file_paths[first_file]}:{first_line+1}:', line, end='', file=err, flush=True)
+            else:
+               counts['pangrams'] += 1
+               n_this_gram = 1
+               for word_str in sorted(line_list):
+                  (anagrams, n_anagrams) = lexicon.format_anagrams(word_str)
+                  if n_anagrams == 1:
+                     print(word_str, end=' ', file=out)
+                  else:
+                     print(anagrams, end=' ', file=out)
+                     n_this_gram *= n_anagrams
+               print('', file=out)
+               counts['n_total'] += n_this_gram
+   return counts
+
+# Workers of the checks of several files. The context is
+# (lexicon, masks, file_numbers, file_paths, shard_dir, memory_budget, duplicates),
+# with duplicates filled in only for the last stage.
+
+def keys_worker(filepath: str, context: tuple) -> int:
+   (lexicon, masks, file_numbers, _, shard_dir, memory_budget, _) = context
+   if not os.path.isfile(filepath):
+      return 0 # PUNCH-OUT
+   file_number = file_numbers[filepath]
+   finder = DuplicateFinder(memory_budget, N_PARTITIONS, shard_dir, f'.{file_number}')
+   collect_keys(filepath, finder, lexicon.word2index, masks, file_number)
+   finder.spill()
+   return finder.n_keys
+
+def shard_worker(p: int, context: tuple) -> (list,list):
+   return partition_duplicates(context[4], p)
 
+def report_worker(filepath: str, context: tuple) -> (str,str,dict):
+   (lexicon, masks, file_numbers, file_paths, _, _, duplicates) = context
+   if not os.path.isfile(filepath):
+      return ('', f'!FILE NOT FOUND: {filepath}\n', None) # PUNCH-OUT
+   out = io.StringIO()
+   err = io.StringIO()
+   file_number = file_numbers[filepath]
+   counts = report_file(filepath, lexicon, masks, duplicates.get(file_number, dict()), out, err,
+                        file_number, file_paths)
+   return (out.getvalue(), err.getvalue(), counts)
 
-KNOWN_PGRAMS = set()
-def is_new_pangram(pgram: list, mutable: bool) -> str:
-   '''Returns canonical pangram string if this is a new pangram, None if already known'''
+def check_files(file_paths: list, lexicon: Lexicon, masks: list, processes: int, memory_budget: int) -> int:
+   '''Check several pangrams lists together, print the kept lines and a global report, return n_total'''
+   if processes is None:
+      processes = os.cpu_count() or 1
+   file_numbers = {filepath: i for (i, filepath) in enumerate(file_paths)}
+   with tempfile.TemporaryDirectory(prefix='check-pangrams-') as shard_dir:
+      context = (lexicon, masks, file_numbers, file_paths, shard_dir, memory_budget // processes, None)
+      n_keys = sum([n for (_, n) in scan(keys_worker, file_paths, context, processes)])
+      print("Pangram keys collected:", n_keys, file=sys.stderr, flush=True)
+      duplicates = dict() # file number -> {position: position of the first copy}
+      for (_, (positions, firsts)) in scan(shard_worker, list(range(N_PARTITIONS)), context, processes):
+         for (position, first) in zip(positions, firsts):
+            duplicates.setdefault(split_position(position)[0], dict())[position] = first
    
-   canon_str = sorted_words_str(pgram, mutable)
+   context = context[:-1] + (duplicates,)
+   totals = dict()
+   problems = list()
+   n_missing = 0
+   for (filepath, (out_text, err_text, counts)) in scan(report_worker, file_paths, context, processes):
+      sys.stderr.write(err_text)
+      sys.stdout.write(out_text)
+      if counts is None:
+         n_missing += 1
+         continue
+      for (k, v) in counts.items():
+         totals[k] = totals.get(k, 0) + v
+      if counts['duplicates'] + counts['not_pangrams'] + counts['words_not_found'] > 0:
+         problems.append(f'   {filepath}: {counts["duplicates"]} duplicates ({counts["duplicates_across"]} across files), '
+                         f'{counts["not_pangrams"]} not pangrams, {counts["words_not_found"]} with words not found')
+   sys.stdout.flush()
    
-   if canon_str in KNOWN_PGRAMS:
-      return None
-   else:
-      KNOWN_PGRAMS.add(canon_str)
-      return canon_str
-
-def format_anagrams(anagrams_dict, word_str) -> (str,int):
-   word_anagrams = anagrams_dict.anagrams_of_str(word_str)
-   if word_anagrams is None:
-      return (word_str,1)
-   else:
-      a = f'[{word_str}'
-      for w in word_anagrams:
-         a += f'|{w}'
-      a += ']'
-      return (a, 1+len(word_anagrams))
+   print(f'Checked {len(file_paths)} files:', file=sys.stderr)
+   if n_missing > 0:
+      print(f'   {n_missing} files not found', file=sys.stderr)
+   for problem in problems:
+      print(problem, file=sys.stderr)
+   print(f'Pangrams kept: {totals.get("pangrams", 0):,}  counts lines: {totals.get("counts_lines", 0):,}', file=sys.stderr)
+   print(f'Duplicates: {totals.get("duplicates", 0):,} ({totals.get("duplicates_across", 0):,} across files)'
+         f'  not pangrams: {totals.get("not_pangrams", 0):,}'
+         f'  words not found: {totals.get("words_not_found", 0):,}', file=sys.stderr, flush=True)
+   return totals.get('n_total', 0)
 
 if __name__ == "__main__":
-   if len(sys.argv) != 3:
-      exit("Usage: check-pangrams word-list pangrams-list")
+   (processes, args) = processes_arg(sys.argv, USAGE)
+   memory_budget = MEMORY_BUDGET
+   if len(args) >= 1 and args[0] == '-m':
+      if len(args) < 2 or not args[1].isdigit() or int(args[1]) < 1:
+         exit(USAGE)
+      memory_budget = int(args[1]) << 20
+      args = args[2:]
+   if len(args) < 2:
+      exit(USAGE)
    
    # The given word list file should contain all 5L words desired to search
    # to validate the pangrams from the pangrams list file.
-   ALL_WORDS_FILE = sys.argv[1]
-   print("Reading word list:", ALL_WORDS_FILE, file=sys.stderr, flush=True)
-   all_words = WordList.from_file(ALL_WORDS_FILE)
-   all_words.sort()
-   
+   ALL_WORDS_FILE = args[0]
+   print("Loading lexicon of word list:", ALL_WORDS_FILE, file=sys.stderr, flush=True)
+   # The lexicon has the sets of anagrammatic words of the word list worked out already.
    # We can prune all but one of any sets of anagrammatic words.
    # Any pangrams found for one anagram work with all anagrams.
-   anagrams_dict = AnagramsDict()
-   anagrams_dict.add_wordlist(all_words)
-   anagrams_dict.prune() # Remove entries with just one anagram, i.e. the root word
-   anagrams_dict.sort() # Sort the lists of anagrams within the dict for consistent results
+   lexicon = Lexicon.open(ALL_WORDS_FILE)
+   anagram_sets = lexicon.anagram_sets()
+   # The letter mask of each word index, as plain ints which are much faster to OR than numpy's.
+   masks = lexicon.records['mask'].tolist()
    
    # We're done with initial setup, print a couple things to make
    # rough timing of the setup steps easy.
-   print("All words len:", len(all_words), file=sys.stderr, flush=True)
-   print("Anagrams dict entries:", len(anagrams_dict), file=sys.stderr, flush=True)
-   print("Anagrams total count:", anagrams_dict.total_words(), file=sys.stderr, flush=True)
+   print("All words len:", len(lexicon), file=sys.stderr, flush=True)
+   print("Anagrams dict entries:", len(anagram_sets), file=sys.stderr, flush=True)
+   print("Anagrams total count:", sum([len(v) for v in anagram_sets]), file=sys.stderr, flush=True)
    
-   alphabet_set = set('ABCDEFGHIJKLMNOPQRSTUVWXYZ')
-
    # Read through the pangrams file. There are two kinds of lines we need
    # to process and keep: pangrams and counts.
    #
    # Any line with six elements should be a pangram, but if it fails any
    # of the pangram integrity tests we print to stderr with a leading '!'.
+   # A pangram is valid when the 26-bit letter masks of its words OR together
+   # to all 26 letters.
    #
-   # Counts lines look like "# WORD = <integer>\n" and also need to be
-   # preserved for the output phase below.
-   PANGRAM_LIST_FILE = sys.argv[2]
-   kept_lines = list()
-   if os.path.isfile(PANGRAM_LIST_FILE):
-      with open(PANGRAM_LIST_FILE, 'r') as f:
-         for line in f:
-            line_list = line.split()
-            if len(line_list) == 4 and line_list[0] == '#':
-               # This looks like a counts line, just keep it (minus the newline)
-               kept_lines.append(line.rstrip())
-            elif len(line_list) == 6:
-               # OK, we have a line of six strings separated by whitespace.
-               all_six_are_words = True
-               letter_set = set()
-               for w in line_list:
-                  # Check that the next string is in the word list.
-                  if not all_words.contains(w):
-                     print("!WORD NOT FOUND:", w, file=sys.stderr, flush=True)
-                     all_six_are_words = False
-                     break
-                  else:
-                     # Accumulate the letters of w into the letter-set for this line.
-                     letter_set.update(set(w))
-                     
-               if all_six_are_words:
-                  # All six strings are words in the all_words list.
-                  # Check to see if the alleged pangram actually uses all 26 letters.
-                  if letter_set != alphabet_set:
-                     print("!NOT A PANGRAM:", line, end='', file=sys.stderr, flush=True)
-                  else:
-                     # Validate pangram is not a duplicate and print if not.
-                     pgram_str = is_new_pangram(line_list, mutable=False)
-                     if not pgram_str is None:
-                        #print(line, end='')
-                        kept_lines.append(pgram_str)
-                     else:
-                        print("!DUPLICATE:", line, end='', file=sys.stderr, flush=True)
-               else:
-                  print("!SOME WORDS NOT FOUND:", line, end='', file=sys.stderr, flush=True)
-   
-   # PRINT OUT PANGRAMS WITH ANAGRAMS!
+   # Counts lines look like "# WORD = <integer>\n" and are kept as they are.
    #
-   # kept_lines at this point contains all the found solutions,
-   # as strings of space-separated words in canonical (sorted) order.
+   # The file is read twice. The first pass only collects the packed key (the
+   # sorted word indices) of each valid pangram by line number, which is enough
+   # to find the duplicates in bounded memory (see pangram_keys.py). The second
+   # pass reports the bad lines and prints the kept ones as it goes, so no more
+   # than one line of the file is ever held in memory.
    #
+   # The kept pangrams are printed as their words in canonical (sorted) order.
    # But any word in any of those pangram lists might have anagrams,
    # so look for those and print them like [VIGOR|VIRGO]
+   # For counts lines like "# WORD = <integer>" we want to format WORD also with any anagrams.
    #
-   # We may also have kept lines that start with '#', which for now
-   # are expected to always be counts lines like "# WORD = <integer>"
-   # For those, we want to format WORD also with any anagrams.
-   #
-   n_total = 0
-   for kept_line in kept_lines:
-      kept_strs = kept_line.split()
-      if kept_strs[0] == '#':
-         (anagrams, n_anagrams) = format_anagrams(anagrams_dict, kept_strs[1])
-         if n_anagrams == 1:
-            print(kept_line)
-         else:
-            print(f'# {anagrams} = {kept_strs[3]}')
-      else:
-         n_this_gram = 1
-         for word_str in kept_strs:
-            (anagrams, n_anagrams) = format_anagrams(anagrams_dict, word_str)
-            if n_anagrams == 1:
-               print(word_str, end=' ')
-            else:
-               print(anagrams, end=' ')
-               n_this_gram *= n_anagrams
-         print('')
-         n_total += n_this_gram
+   if len(args) > 2:
+      n_total = check_files(args[1:], lexicon, masks, processes, memory_budget)
+   else:
+      PANGRAM_LIST_FILE = args[1]
+      n_total = 0
+      if os.path.isfile(PANGRAM_LIST_FILE):
+         finder = DuplicateFinder(memory_budget)
+         collect_keys(PANGRAM_LIST_FILE, finder, lexicon.word2index, masks)
+         duplicates = finder.duplicates()
+         counts = report_file(PANGRAM_LIST_FILE, lexicon, masks, duplicates, sys.stdout, sys.stderr)
+         n_total = counts['n_total']
          
    print("Total pangrams counting anagrams:", n_total, file=sys.stderr, flush=True)
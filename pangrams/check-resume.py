@@ -0,0 +1,138 @@
+#!/usr/bin/python3
+# Copyright (C) 2025 Dez Moleski dez@moleski.com
+# MIT License: All uses allowed with attribution.
+#
+# Checks that a searcher resumed from a checkpoint finds just the pangrams it
+# should: from the STACK: lines it prints on SIGUSR1 (the checkpoints the
+# coordinator restarts it from), and from the LAST: line it prints on SIGHUP.
+#
+# The searcher is run once over the whole search from the given head word,
+# signaled with SIGUSR1 every few seconds for its STACK: lines. Then it's run
+# again from each of those checkpoints. The search goes through the lines of
+# six words in order, so each of those runs must find exactly the pangrams of
+# the whole search from the checkpoint's words on. Before all that, it's run
+# from the head word and stopped with SIGHUP after a few seconds, and at the
+# end it's resumed from the LAST: line of that run: the two runs together must
+# find exactly the pangrams of the whole search.
+#
+# With -c, all the runs use the searcher's pruning cache file (pangram2 -c),
+# which by the resumed runs has everything the whole search found in it, so
+# resuming with a warm cache is checked too.
+#
+# pangram2 takes a while over a whole letter (and each resume runs on to the
+# end of the word list), so start from a head word late in the list, or check
+# only some of the checkpoints with -n.
+#
+import sys
+import os
+import os.path
+import signal
+import subprocess
+import tempfile
+import time
+
+USAGE = "Usage: check-resume [-c cache-file] [-i seconds] [-h seconds] [-n checkpoints] searcher head-word"
+
+def pangram_lines(text: str) -> list:
+   """ The lines of six words, each as a list of the words """
+   return [line.split() for line in text.splitlines() if len(line.split()) == 6]
+
+def run_searcher(command: list, usr1_every: float = None, hup_after: float = None) -> (str,str):
+   """ Run the searcher to the end, signaling it with SIGUSR1 every usr1_every seconds, or with SIGHUP
+   after hup_after seconds. Returns its stdout and stderr.
+   """
+   with tempfile.TemporaryFile() as out, tempfile.TemporaryFile() as err:
+      process = subprocess.Popen(command, stdout=out, stderr=err)
+      while True:
+         try:
+            process.wait(timeout=hup_after or usr1_every)
+            break
+         except subprocess.TimeoutExpired:
+            if hup_after is not None:
+               process.send_signal(signal.SIGHUP)
+               (hup_after, usr1_every) = (None, None)
+            else:
+               process.send_signal(signal.SIGUSR1)
+      out.seek(0)
+      err.seek(0)
+      (out_text, err_text) = (out.read().decode(), err.read().decode())
+   # Only a searcher killed by a signal failed: void main() exits with any status.
+   if process.returncode < 0:
+      sys.stderr.write(err_text)
+      exit(f'ERROR: {" ".join(command)} killed by signal {-process.returncode}')
+   return (out_text, err_text)
+
+def compare(name: str, found: list, expected: list) -> bool:
+   """ Report the pangrams missing from or extra in what was found, returns True if they're the same """
+   if found == expected:
+      return True # PUNCH-OUT
+   found_set = set([' '.join(p) for p in found])
+   expected_set = set([' '.join(p) for p in expected])
+   missing = sorted(expected_set - found_set)
+   extra = sorted(found_set - expected_set)
+   print(f'!{name}: {len(missing)} missing, {len(extra)} extra, of {len(expected):,}', flush=True)
+   for p in missing[:3]:
+      print(f'   - {p}')
+   for p in extra[:3]:
+      print(f'   + {p}')
+   return False
+
+if __name__ == "__main__":
+   args = sys.argv[1:]
+   cache_args = list()
+   seconds = {'-i': 1.0, '-h': 10.0} # between SIGUSR1 signals, and before SIGHUP
+   n_checkpoints = None
+   while len(args) >= 2 and args[0] in ('-c', '-i', '-h', '-n'):
+      if args[0] == '-c':
+         cache_args = ['-c', args[1]]
+      elif args[0] in seconds:
+         try:
+            seconds[args[0]] = float(args[1])
+         except ValueError:
+            exit(USAGE)
+      else:
+         if not args[1].isdigit() or int(args[1]) < 1:
+            exit(USAGE)
+         n_checkpoints = int(args[1])
+      args = args[2:]
+   if len(args) != 2:
+      exit(USAGE)
+   (searcher, head_word) = (args[0], args[1].upper())
+   if not os.path.isfile(searcher):
+      exit(f'ERROR: searcher {searcher} not found.')
+   command = [searcher] + cache_args
+
+   # Stop a search partway through, to resume it from where it stopped at the end.
+   (stopped, _) = run_searcher(command + [head_word], hup_after=seconds['-h'])
+   last = [line.split()[1:] for line in stopped.splitlines() if line.startswith('LAST:')]
+
+   start = time.time()
+   (out, err) = run_searcher(command + [head_word], usr1_every=seconds['-i'])
+   whole_seconds = time.time() - start
+   whole = pangram_lines(out)
+   checkpoints = [line.split()[1:] for line in err.splitlines() if line.startswith('STACK:')]
+   if n_checkpoints is not None and len(checkpoints) > n_checkpoints:
+      checkpoints = [checkpoints[i * len(checkpoints) // n_checkpoints] for i in range(n_checkpoints)]
+   print(f'Whole search from {head_word}: {len(whole):,} pangrams in {whole_seconds:.1f} seconds, '
+         f'checking {len(checkpoints)} STACK: checkpoints', flush=True)
+
+   n_failed = 0
+   for checkpoint in checkpoints:
+      (out, _) = run_searcher(command + checkpoint)
+      expected = [p for p in whole if p >= checkpoint]
+      if not compare('RESUMED FROM STACK: ' + ' '.join(checkpoint), pangram_lines(out), expected):
+         n_failed += 1
+
+   n_checked = len(checkpoints)
+   if len(last) == 0:
+      print('No LAST: line, the search finished before SIGHUP.')
+   else:
+      (resumed, _) = run_searcher(command + last[0])
+      n_checked += 1
+      if not compare('STOPPED AND RESUMED FROM LAST: ' + ' '.join(last[0]),
+                     pangram_lines(stopped) + pangram_lines(resumed), whole):
+         n_failed += 1
+
+   print(f'Resumes checked: {n_checked}, failed: {n_failed}')
+   if n_failed > 0:
+      exit(1)
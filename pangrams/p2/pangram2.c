@@ -7,6 +7,11 @@
 #include <string.h>
 #include <unistd.h> // sleep
 #include <stdint.h> // __builtin_popcount
+#include <fcntl.h> // open
+#include <sys/mman.h> // mmap
+#include <sys/file.h> // flock
+#include <sys/stat.h> // fstat
+#include <pthread.h>
 #include "all_words.inl"
 #include "wordle.c" // yes, weird, but that's how it's meant to be done
 
@@ -14,18 +19,103 @@
 // The index into the pruning cache is the 26-bit mask that represents a
 // state of the search in terms of letters found/remaining, plus (OR'd with)
 // a loop-level index (3 bits), so requires (2^29)-1 entries.
+// (Or much less, built with -DSPARSE_CACHE, see below.)
 uint32_t level1_mask = 0;
 uint32_t level2_mask = (1<<26);
 uint32_t level3_mask = (2<<26);
 uint32_t level4_mask = (3<<26);
 uint32_t level5_mask = (4<<26);
 uint32_t level6_mask = (5<<26);
-#define CACHE_SIZE (1<<29)
-uint16_t PRUNE_CACHE[CACHE_SIZE];
+uint16_t *PRUNE_CACHE;
+#define DENSE_CACHE_SIZE (1<<29)
+#define SPARSE_CACHE_SIZE 67025181
 
-// What's stored in the cache is either one of two static values:
+#ifdef SPARSE_CACHE
+// Built with -DSPARSE_CACHE, the cache only has room for the states the search can store at each
+// level: after K words, 26-5K to 30-5K letters remain (no fewer, since a word has at most 5 letters,
+// and no more, or the letter bounds in the search would have skipped it), and only levels 2 to 5 are
+// stored. Within each level and number of letters, the place of a mask is its rank among the masks
+// with that many letters (in the combinatorial number system: the sum of C(b, i) for the i'th bit b
+// set, counting from 1), worked out a byte of the mask at a time from a table. That's 67,025,181
+// entries, 128 MiB instead of 1 GiB, with just the same information in them, so the same prunes.
+// A cache file (-c) of one build is no use to the other, which stops with an error rather than
+// write over it.
+#define CACHE_SIZE SPARSE_CACHE_SIZE
+#define CACHE_BUILD "sparse"
+#define OTHER_CACHE_SIZE DENSE_CACHE_SIZE
+#define OTHER_CACHE_BUILD "dense"
+int CACHE_MIN_LETTERS[6] = {27, 16, 11, 6, 1, 27}; // by level - 1, 27 for levels not stored
+uint32_t CACHE_BASE[6][5]; // index of the first mask of each level, and number of letters over the minimum
+uint32_t CACHE_RANK[4][21][256]; // rank of each byte of a mask, by byte, and bits set in the bytes below
+
+void init_sparse_cache(void)
+{
+  uint32_t choose[27][27];
+  memset(choose, 0, sizeof(choose));
+  for (int n = 0; n <= 26; ++n) {
+    choose[n][0] = 1;
+    for (int k = 1; k <= n; ++k) {
+      choose[n][k] = choose[n-1][k-1] + choose[n-1][k];
+    }
+  }
+  for (int byte = 0; byte < 4; ++byte) {
+    for (int below = 0; below <= 20; ++below) {
+      for (int bits = 0; bits < 256; ++bits) {
+	uint32_t rank = 0;
+	for (int b = 0, i = below; b < 8 && 8*byte + b < 26; ++b) {
+	  if (bits & (1<<b)) {
+	    ++i;
+	    rank += (i <= 26) ? choose[8*byte + b][i] : 0;
+	  }
+	}
+	CACHE_RANK[byte][below][bits] = rank;
+      }
+    }
+  }
+  uint32_t size = 0;
+  for (int level = 0; level < 6; ++level) {
+    for (int r = 0; r < 5 && CACHE_MIN_LETTERS[level] + r <= 26; ++r) {
+      CACHE_BASE[level][r] = size;
+      size += choose[26][CACHE_MIN_LETTERS[level] + r];
+    }
+  }
+  if (size != CACHE_SIZE) {
+    fprintf(stderr, "ERROR: sparse pruning cache has %u entries, not %u.\n", size, CACHE_SIZE);
+    exit(1);
+  }
+}
+
+// The index in the cache of a state (level + letter bits), or -1 if it's not stored.
+static inline int32_t cache_index(uint32_t ci)
+{
+  uint32_t level = ci >> 26;
+  uint32_t mask = ci & CHARMASK_A_Z;
+  int r = __builtin_popcount(mask) - CACHE_MIN_LETTERS[level];
+  if (r < 0 || r > 4) {
+    return -1; // PUNCH-OUT
+  }
+  int below1 = __builtin_popcount(mask & 0xFF);
+  int below2 = below1 + __builtin_popcount(mask & 0xFF00);
+  int below3 = below2 + __builtin_popcount(mask & 0xFF0000);
+  return CACHE_BASE[level][r] +
+    CACHE_RANK[0][0][mask & 0xFF] +
+    CACHE_RANK[1][below1][(mask >> 8) & 0xFF] +
+    CACHE_RANK[2][below2][(mask >> 16) & 0xFF] +
+    CACHE_RANK[3][below3][mask >> 24];
+}
+#else
+// By default the cache is the whole array, indexed by the state itself.
+#define CACHE_SIZE DENSE_CACHE_SIZE
+#define CACHE_BUILD "dense"
+#define OTHER_CACHE_SIZE SPARSE_CACHE_SIZE
+#define OTHER_CACHE_BUILD "sparse"
+#define cache_index(ci) ((int32_t)(ci))
+#endif
+
+// What's stored in the cache is either the static value:
 //  CACHE_NO_INFO == 0xFFFF i.e. at first we know nothing,
-//  CACHE_PANGRAM_FOUND == 0xFFFE means some pangram was found from this state, for some next word,
+// (or CACHE_PANGRAM_FOUND == 0xFFFE, in cache files from before, which was written when some pangram
+// was found from this state, for some next word; it says no more than CACHE_NO_INFO for pruning),
 // or a word index (hence the u16 value) which indicates NO PANGRAMS
 // were found from the index state (level + letter bits) when searching from that word index.
 // When a word index is present, and a search reaches that (level + letter bits), if the next
@@ -37,6 +127,26 @@ uint16_t PRUNE_CACHE[CACHE_SIZE];
 #define CACHE_NO_INFO 0xFFFF
 #define CACHE_PANGRAM_FOUND 0xFFFE
 
+// The cache is shared by all the search threads (-t). A word index only ever says less when it's
+// higher, so an entry is only ever lowered, atomically, and no thread can undo what another found.
+// The loads are atomic too, but relaxed: a stale value just means a missed prune.
+static inline uint16_t cache_get(uint32_t ci)
+{
+  int32_t i = cache_index(ci);
+  return (i < 0) ? CACHE_NO_INFO : __atomic_load_n(PRUNE_CACHE + i, __ATOMIC_RELAXED);
+}
+
+static inline void cache_min(uint32_t ci, uint16_t w)
+{
+  int32_t i = cache_index(ci);
+  if (i < 0) {
+    return; // PUNCH-OUT
+  }
+  uint16_t old = __atomic_load_n(PRUNE_CACHE + i, __ATOMIC_RELAXED);
+  while (w < old && !__atomic_compare_exchange_n(PRUNE_CACHE + i, &old, w, true,
+						   __ATOMIC_RELAXED, __ATOMIC_RELAXED));
+}
+
 #define count_letters(m) __builtin_popcount(m)
 
 /*
@@ -92,6 +202,177 @@ void sigusr2_handler(int sig)
   sigusr2_received = 1;
 }
 
+// The pruning cache can be kept in a file, given with -c, so a search that's resumed with
+// skip-to words, or repeated, starts with everything the earlier runs learned about dead
+// ends instead of from nothing. The file is the cache itself, memory-mapped, followed by a
+// trailer with the word list the word indices in it refer to. Every entry written is true
+// whenever the search stops, so the file is good however the search stops (it's synced to
+// disk on SIGHUP and at exit). If the word list has changed, the word indices are moved to
+// the new list, as far as they're still true of it. Only a new or empty file is made into a cache;
+// given any other file that isn't a good cache, pangram2 stops rather than write over it.
+#define CACHE_BYTES ((size_t)CACHE_SIZE * sizeof(uint16_t))
+#define OTHER_CACHE_BYTES ((size_t)OTHER_CACHE_SIZE * sizeof(uint16_t))
+#define CACHE_FILE_MAGIC "PRUNE2\n"
+#define CACHE_FILE_VERSION 1
+
+typedef struct
+{
+  char     magic[8];
+  uint32_t version;
+  uint32_t valid; // 0 while the cache is being filled or moved to a new word list
+  uint32_t cache_size;
+  uint32_t n_words;
+  // followed by the n_words words of the word list, 5 letters each
+} CacheFileTrailer;
+
+int cache_fd = -1;
+
+// Read the cache file trailer at the given offset. Returns false if there isn't one there.
+bool read_cache_trailer(CacheFileTrailer *trailer, size_t offset, off_t file_size)
+{
+  return file_size >= offset + sizeof(*trailer) &&
+    pread(cache_fd, trailer, sizeof(*trailer), offset) == sizeof(*trailer) &&
+    memcmp(trailer->magic, CACHE_FILE_MAGIC, sizeof(trailer->magic)) == 0;
+}
+
+void write_cache_trailer(bool valid)
+{
+  CacheFileTrailer trailer;
+  memset(&trailer, 0, sizeof(trailer));
+  memcpy(trailer.magic, CACHE_FILE_MAGIC, sizeof(trailer.magic));
+  trailer.version = CACHE_FILE_VERSION;
+  trailer.valid = valid;
+  trailer.cache_size = CACHE_SIZE;
+  trailer.n_words = N;
+  char *words = malloc(N * 5);
+  for (int w = 0; w < N; ++w) {
+    memcpy(words + 5*w, ALL_WORDS[WORDS[w]].word, 5);
+  }
+  if (ftruncate(cache_fd, CACHE_BYTES + sizeof(trailer) + N * 5) != 0 ||
+      pwrite(cache_fd, &trailer, sizeof(trailer), CACHE_BYTES) != sizeof(trailer) ||
+      pwrite(cache_fd, words, N * 5, CACHE_BYTES + sizeof(trailer)) != N * 5 ||
+      fsync(cache_fd) != 0) {
+    perror("ERROR: writing the pruning cache file");
+    exit(1);
+  }
+  free(words);
+}
+
+// Move the word indices in the cache from the old word list to the current one. An entry w
+// says no pangram was found searching on from the words after w, and it's still true of the
+// current words after w' if they're all old words after w: so w' is just before the first
+// old word after w that's still in the list, or the last new word, whichever is later.
+void remap_prune_cache(char *old_words, int n_old)
+{
+  uint16_t *moved = malloc(n_old * sizeof(uint16_t));
+  int last_new = -1;
+  for (int w = 0, o = 0; w < N; ++w) {
+    const char *word = ALL_WORDS[WORDS[w]].word;
+    while (o < n_old && strncmp(old_words + 5*o, word, 5) < 0) ++o;
+    if (o >= n_old || strncmp(old_words + 5*o, word, 5) != 0) last_new = w;
+  }
+  // From the end of the old list back, the new index of the first remaining old word after each.
+  int next_kept = N;
+  for (int o = n_old - 1, w = N - 1; o >= 0; --o) {
+    int after = (next_kept - 1 > last_new) ? next_kept - 1 : last_new;
+    moved[o] = (after > 0) ? after : 0;
+    while (w >= 0 && strncmp(ALL_WORDS[WORDS[w]].word, old_words + 5*o, 5) > 0) --w;
+    if (w >= 0 && strncmp(ALL_WORDS[WORDS[w]].word, old_words + 5*o, 5) == 0) next_kept = w;
+  }
+  for (size_t i = 0; i < CACHE_SIZE; ++i) {
+    uint16_t v = PRUNE_CACHE[i];
+    if (v < CACHE_PANGRAM_FOUND) {
+      PRUNE_CACHE[i] = (v < n_old) ? moved[v] : CACHE_NO_INFO;
+    }
+  }
+  free(moved);
+}
+
+void open_prune_cache(char *path)
+{
+  cache_fd = open(path, O_RDWR | O_CREAT, 0644);
+  if (cache_fd < 0) {
+    perror(path);
+    exit(1);
+  }
+  // Two searches writing the same cache could each undo what the other found.
+  if (flock(cache_fd, LOCK_EX | LOCK_NB) != 0) {
+    fprintf(stderr, "ERROR: pruning cache file %s is in use by another search.\n", path);
+    exit(1);
+  }
+
+  // Read the trailer and the word list of the cache. Only a new (empty) file is made into a cache:
+  // anything else that isn't a cache of this build is left alone.
+  struct stat st;
+  CacheFileTrailer trailer;
+  char *old_words = NULL;
+  fstat(cache_fd, &st);
+  bool good = false;
+  if (st.st_size > 0) {
+    if (!read_cache_trailer(&trailer, CACHE_BYTES, st.st_size)) {
+      if (read_cache_trailer(&trailer, OTHER_CACHE_BYTES, st.st_size) && trailer.cache_size == OTHER_CACHE_SIZE) {
+	fprintf(stderr, "ERROR: %s is a pruning cache of pangram2 built with the %s cache, this is the %s one.\n",
+		path, OTHER_CACHE_BUILD, CACHE_BUILD);
+      } else {
+	fprintf(stderr, "ERROR: %s is not a pruning cache file (bad magic).\n", path);
+      }
+      exit(1);
+    }
+    if (trailer.version != CACHE_FILE_VERSION || trailer.cache_size != CACHE_SIZE ||
+	st.st_size != CACHE_BYTES + sizeof(trailer) + trailer.n_words * 5) {
+      fprintf(stderr, "ERROR: pruning cache file %s is version %u with %u entries and %ld bytes, "
+	      "not version %u with %u entries and %zu bytes.\n", path, trailer.version, trailer.cache_size,
+	      (long)st.st_size, CACHE_FILE_VERSION, CACHE_SIZE, CACHE_BYTES + sizeof(trailer) + trailer.n_words * 5);
+      exit(1);
+    }
+    // A cache left half filled or moved to a new word list is no good, but it's ours to start over.
+    good = trailer.valid;
+  }
+  if (good) {
+    old_words = malloc(trailer.n_words * 5);
+    good = pread(cache_fd, old_words, trailer.n_words * 5, CACHE_BYTES + sizeof(trailer)) == trailer.n_words * 5;
+  }
+  bool same_words = good && trailer.n_words == N;
+  for (int w = 0; same_words && w < N; ++w) {
+    same_words = memcmp(old_words + 5*w, ALL_WORDS[WORDS[w]].word, 5) == 0;
+  }
+  
+  // Until it's filled or remapped, it's no good to anyone.
+  if (!same_words) {
+    write_cache_trailer(false);
+  }
+  PRUNE_CACHE = mmap(NULL, CACHE_BYTES, PROT_READ | PROT_WRITE, MAP_SHARED, cache_fd, 0);
+  if (PRUNE_CACHE == MAP_FAILED) {
+    perror("ERROR: mapping the pruning cache file");
+    exit(1);
+  }
+  if (same_words) {
+    fprintf(stderr, "PRUNE CACHE: %s\n", path);
+  } else if (good) {
+    fprintf(stderr, "PRUNE CACHE: %s, moving from %u to %d words\n", path, trailer.n_words, N);
+    remap_prune_cache(old_words, trailer.n_words);
+  } else {
+    fprintf(stderr, "PRUNE CACHE: %s, %s\n", path, (st.st_size > 0) ? "unfinished, starting over" : "new");
+    for (size_t i = 0; i < CACHE_SIZE; ++i) {
+      PRUNE_CACHE[i] = CACHE_NO_INFO;
+    }
+  }
+  fflush(stderr);
+  free(old_words);
+  if (!same_words) {
+    msync(PRUNE_CACHE, CACHE_BYTES, MS_SYNC);
+    write_cache_trailer(true);
+  }
+}
+
+// At exit, including after SIGHUP, make sure the cache file is all on disk.
+void sync_prune_cache(void)
+{
+  if (cache_fd >= 0) {
+    msync(PRUNE_CACHE, CACHE_BYTES, MS_SYNC);
+  }
+}
+
 void print_anagrams(int w)
 {
   // The given int w is an index into the WORDS array, which contains ALL_WORDS indices.
@@ -114,378 +395,692 @@ void print_anagrams(int w)
   }
 }
 
-void main(int argc, char **argv)
+// The state of one search: the words to skip to at each level, the counters at each level,
+// and where the pangrams and counts lines go. With threads (-t), there's one per thread.
+typedef struct
 {
-  // Handle SIGHUP to exit gracefully.
-  signal(SIGHUP, sighup_handler);
-
-  // Handle SIGUSR1 to print some information.
-  signal(SIGUSR1, sigusr1_handler);
-  
-  // Handle SIGUSR2 to pause and restart the search.
-  signal(SIGUSR2, sigusr2_handler);
-  
-  // Set up the anagrams_index for each WordleWord in ALL_WORDS.
-  init_anagrams_indices();
+  char *skip[7]; // skip-to words at levels 1-6, or NULL
+  uint64_t h[7]; // PRUNE CACHE hit counter at each level.
+  uint64_t n[7]; // iteration counter at each level.
+  uint64_t ln[7]; // "last" iteration counter at each level.
+  FILE *out; // stdout, or the buffer of the head word being searched
+  int w1; // the head word being searched
+  bool stopped; // the search of the head word stopped on SIGHUP, at the words in last
+  char last[64]; // "LAST: w1 .. w6" line of the stopped search
+} Searcher;
 
-  // The zero'th element of the ALL_WORDS array is empty.
-  // This lets us use word index zero to mean "no word" analogous to '\0' meaning "no char"
-  // We can also call this the null word (analogous to null char)
-  
-  // Just for symmetry: a0 is the initial alphabet mask, all 26 letters.
-  uint32_t a0 = CHARMASK_A_Z;
-  // a1, a2, etc. are the alphabet letters remaining at each level.
-  uint32_t a1, a2, a3, a4, a5, a6;
-  uint32_t n_pangrams_found; // count of pangrams found per word
-  bool b_print_n_found; // can we trust & print n_pangrams_found?
-  uint32_t ci1, ci2, ci3, ci4, ci5, ci6; // PRUNE CACHE index at each iteration, at each level.
-  uint64_t h1=0, h2=0, h3=0, h4=0, h5=0, h6=0; // PRUNE CACHE hit counter at each level.
-  uint64_t n1=0, n2=0, n3=0, n4=0, n5=0, n6=0; // iteration counter at each level.
-  uint64_t ln1=0, ln2=0, ln3=0, ln4=0, ln5=0, ln6=0; // "last" iteration counter at each level.
-  WordleWord *pw1,*pw2,*pw3,*pw4,*pw5,*pw6;
-  int r2, r3, r4, r5;
-  int v2, v3, v4, v5;
-  char *skip1 = NULL;
-  char *skip2 = NULL;
-  char *skip3 = NULL;
-  char *skip4 = NULL;
-  char *skip5 = NULL;
-  char *skip6 = NULL;
+int n_threads = 1;
+volatile sig_atomic_t paused = 0; // search threads paused by SIGUSR2
 
-  // Init the cache with the NO INFO marker.
-  for (int i = 0; i < CACHE_SIZE; ++i) {
-    PRUNE_CACHE[i] = CACHE_NO_INFO;
-  }
-  
-  // Look for words to skip ahead to on command line.
-  if (argc > 1) {
-    if (strlen(argv[1]) == 5) {
-      skip1 = argv[1];
+// Print the counters of the searches, summed, and the changes since the last time.
+void print_counts(Searcher *searchers, int n_searchers)
+{
+  uint64_t h[7] = {0}, n[7] = {0}, d[7] = {0};
+  for (int i = 0; i < n_searchers; ++i) {
+    for (int k = 1; k <= 6; ++k) {
+      uint64_t nk = __atomic_load_n(&searchers[i].n[k], __ATOMIC_RELAXED);
+      h[k] += __atomic_load_n(&searchers[i].h[k], __ATOMIC_RELAXED);
+      n[k] += nk;
+      d[k] += nk - searchers[i].ln[k];
+      searchers[i].ln[k] = nk;
     }
   }
-  if (argc > 2) {
-    if (strlen(argv[2]) == 5) {
-      skip2 = argv[2];
+  fprintf(stderr, "PRUNE HITS: %lu %lu %lu %lu %lu %lu\n", h[1], h[2], h[3], h[4], h[5], h[6]);
+  fprintf(stderr, "COUNTS: %lu %lu %lu %lu %lu %lu\n", n[1], n[2], n[3], n[4], n[5], n[6]);
+  fprintf(stderr, "DELTAS: %lu %lu %lu %lu %lu %lu\n", d[1], d[2], d[3], d[4], d[5], d[6]);
+  fflush(stderr);
+}
+
+// Check for a signal to exit gracefully, to print some information and continue, or to
+// pause the search (SIGUSR2) until signaled again. With threads, the main thread prints
+// the information and pauses the search, and a thread told to stop just gives up on its
+// head word. Returns true if the search of the head word should stop here.
+bool check_signals(Searcher *s, WordleWord *pw1, WordleWord *pw2, WordleWord *pw3,
+		   WordleWord *pw4, WordleWord *pw5, WordleWord *pw6)
+{
+  if (sighup_received) {
+    snprintf(s->last, sizeof(s->last), "LAST: %s %s %s %s %s %s",
+	     pw1->word,
+	     pw2->word,
+	     pw3->word,
+	     pw4->word,
+	     pw5->word,
+	     pw6->word);
+    if (n_threads == 1) {
+      printf("%s\n", s->last);
+      exit(0);
     }
+    s->stopped = true;
+    return true;
   }
-  if (argc > 3) {
-    if (strlen(argv[3]) == 5) {
-      skip3 = argv[3];
+  if (n_threads > 1) {
+    while (paused && !sighup_received) {
+      sleep(1);
     }
+    return false;
   }
-  if (argc > 4) {
-    if (strlen(argv[4]) == 5) {
-      skip4 = argv[4];
+
+  sigusr1_received = 0;
+  fprintf(stderr, "STACK: %s %s %s %s %s %s\n",
+	  pw1->word,
+	  pw2->word,
+	  pw3->word,
+	  pw4->word,
+	  pw5->word,
+	  pw6->word);
+  print_counts(s, 1);
+  if (sigusr2_received) {
+    sigusr2_received = 0;
+    fprintf(stderr, "PAUSED ... ");
+    fflush(stderr);
+    while (sigusr2_received == 0) {
+      sleep(60); // signal should wake me up so it shouldn't matter how long I sleep
     }
+    sigusr2_received = 0;
+    fprintf(stderr, "RESUMING!\n");
+    fflush(stderr);
   }
-  if (argc > 5) {
-    if (strlen(argv[5]) == 5) {
-      skip5 = argv[5];
-    }
+  return false;
+}
+
+// The skip-to words below a level are only for the search under the word skipped to at that level.
+// Once the loop is past that word (done with it, or dropped it: a warm cache may prune it now), or
+// the word skipped to isn't the skip-to word itself (it's not in the list), they're done with too.
+// (The skip-to words are always some levels in a row, so if the next level's is gone, they all are.)
+static inline void end_skips_below(Searcher *s, int level)
+{
+  for (int k = level + 1; k <= 6 && s->skip[k] != NULL; ++k) {
+    s->skip[k] = NULL;
   }
-  if (argc > 6) {
-    if (strlen(argv[6]) == 5) {
-      skip6 = argv[6];
-    }
+}
+
+// At the end of each iteration of the loop at a level (1 to 5).
+static inline void skips_done(Searcher *s, int level)
+{
+  if (s->skip[level] == NULL && s->skip[level + 1] != NULL) {
+    end_skips_below(s, level);
   }
-  
-  for(int w1 = 0; w1 < N; ++w1,++n1) {
-    pw1 = ALL_WORDS + WORDS[w1];
+}
+
+// Search for all the pangrams with the given head word (the first word, in sorted order).
+void search_head_word(Searcher *s, int w1)
+{
+  // Just for symmetry: a0 is the initial alphabet mask, all 26 letters.
+  uint32_t a0 = CHARMASK_A_Z;
+  // a1, a2, etc. are the alphabet letters remaining at each level.
+  uint32_t a1, a2, a3, a4, a5, a6;
+  uint32_t n_pangrams_found; // count of pangrams found per word
+  bool b_print_n_found; // can we trust & print n_pangrams_found?
+  uint32_t ci2, ci3, ci4, ci5; // PRUNE CACHE index at each iteration, at each level.
+  WordleWord *pw1,*pw2,*pw3,*pw4,*pw5,*pw6;
+  int r2, r3, r4, r5;
+  int v2, v3, v4, v5;
+  // Is the loop at each level still skipping to a word, so only searching part of the way from here?
+  // Then finding no pangrams doesn't mean there are none, and mustn't go in the pruning cache.
+  bool partial3, partial4, partial5, partial6;
+  // Did the loop at each level find a pangram, from the words above it?
+  bool found3, found4, found5, found6;
+
+  s->w1 = w1;
+  pw1 = ALL_WORDS + WORDS[w1];
+  a1 = a0 & ~(pw1->letters_mask); // letter-bits remaining to be found
+
+  // Reset the count of pangrams found for this word.
+  // Note that if there are SKIPS below level 0, then
+  // we can't rely on this counter and won't print it
+  // for this word.
+  n_pangrams_found = 0;
+  b_print_n_found = true;
+  for(int w2 = w1+1; w2 < N; ++w2,++s->n[2],skips_done(s, 2)) {
+    pw2 = ALL_WORDS + WORDS[w2];
 
     // Check for a skip-to at this level
-    if (skip1 != NULL) {
-      if (strcmp(pw1->word, skip1) < 0) {
+    if (s->skip[2] != NULL) {
+      b_print_n_found = false;
+      if (strcmp(pw2->word, s->skip[2]) < 0) {
 	continue;
       } else {
-	fprintf(stderr, "SKIP-TO(1): %s\n", pw1->word);
+	fprintf(stderr, "SKIP-TO(2): %s\n", pw2->word);
 	fflush(stderr);
-	skip1 = NULL;
+	if (strcmp(pw2->word, s->skip[2]) != 0) {
+	  end_skips_below(s, 2);
+	}
+	s->skip[2] = NULL;
       }
     }
-    
-    a1 = a0 & ~(pw1->letters_mask); // letter-bits remaining to be found
-    ci1 = a1 | level1_mask; // this loop iter and level state index into the pruning cache
-    
-    // Reset the count of pangrams found for this word.
-    // Note that if there are SKIPS below level 0, then
-    // we can't rely on this counter and won't print it
-    // for this word.
-    n_pangrams_found = 0;
-    b_print_n_found = true;
-    for(int w2 = w1+1; w2 < N; ++w2,++n2) {
-      pw2 = ALL_WORDS + WORDS[w2];
-      
+
+    // Skip word if it can't reduce the alphabet remaining.
+    if ((a1 & pw2->letters_mask) == 0) continue;
+    // Mask off this word's letters to get the next alpha remains.
+    a2 = a1 & ~(pw2->letters_mask); // letter-bits remaining to be found
+    ci2 = a2 | level2_mask; // this loop iter and level state index into the pruning cache
+
+    // If the pruning cache has marked this word or lower as producing no pangrams from
+    // this level, then continue to the next word.
+    if (cache_get(ci2) <= w2) {
+      //fprintf(stderr, "HIT 2: %s\n", pw2->word);
+      //fflush(stderr);
+      ++s->h[2];
+      continue;
+    }
+
+    // If the remaining alphabet has more letters than we could possibly remove, continue.
+    r2 = count_letters(a2);
+    if (r2 > 20) continue;
+    // If the remaining alphabet is equal remaining letters, then the only solution
+    // from here down is a heterogram over the remaining letters. That requires
+    // at least as many vowels (counting W & Y liberally) as words remaining.
+    if (r2 == 20) {
+      v2 = count_vowels(a2);
+      if (v2 < 4) continue;
+    }
+    /*
+      fprintf(stderr, "%s %s %08x %d\n",
+      pw1->word,
+      pw2->word, a2, r2);
+      fflush(stderr);
+    */
+    partial3 = (s->skip[3] != NULL);
+    found3 = false;
+    for(int w3 = w2+1; w3 < N; ++w3,++s->n[3],skips_done(s, 3)) {
+      pw3 = ALL_WORDS + WORDS[w3];
+
       // Check for a skip-to at this level
-      if (skip2 != NULL) {
+      if (s->skip[3] != NULL) {
 	b_print_n_found = false;
-	if (strcmp(pw2->word, skip2) < 0) {
+	if (strcmp(pw3->word, s->skip[3]) < 0) {
 	  continue;
 	} else {
-	  fprintf(stderr, "SKIP-TO(2): %s\n", pw2->word);
+	  fprintf(stderr, "SKIP-TO(3): %s\n", pw3->word);
 	  fflush(stderr);
-	  skip2 = NULL;
+	  if (strcmp(pw3->word, s->skip[3]) != 0) {
+	    end_skips_below(s, 3);
+	  }
+	  s->skip[3] = NULL;
 	}
       }
-      
-      // Skip word if it can't reduce the alphabet remaining.
-      if ((a1 & pw2->letters_mask) == 0) continue;
-      // Mask off this word's letters to get the next alpha remains.
-      a2 = a1 & ~(pw2->letters_mask); // letter-bits remaining to be found
-      ci2 = a2 | level2_mask; // this loop iter and level state index into the pruning cache
+
+      if ((a2 & pw3->letters_mask) == 0) continue;
+      a3 = a2 & ~(pw3->letters_mask); // letter-bits remaining to be found
+      ci3 = a3 | level3_mask; // this loop iter and level state index into the pruning cache
 
       // If the pruning cache has marked this word or lower as producing no pangrams from
       // this level, then continue to the next word.
-      if (PRUNE_CACHE[ci2] <= w2) {
-	//fprintf(stderr, "HIT 2: %s\n", pw2->word);
+      if (cache_get(ci3) <= w3) {
+	//fprintf(stderr, "HIT 3: %s\n", pw3->word);
 	//fflush(stderr);
-	++h2;
+	++s->h[3];
 	continue;
       }
-      
-      // If the remaining alphabet has more letters than we could possibly remove, continue.
-      r2 = count_letters(a2);
-      if (r2 > 20) continue;
-      // If the remaining alphabet is equal remaining letters, then the only solution
-      // from here down is a heterogram over the remaining letters. That requires
-      // at least as many vowels (counting W & Y liberally) as words remaining.
-      if (r2 == 20) {
-	v2 = count_vowels(a2);
-	if (v2 < 4) continue;
+
+      r3 = count_letters(a3);
+      if (r3 > 15) continue;
+      if (r3 == 15) {
+	v3 = count_vowels(a3);
+	if (v3 < 3) continue;
       }
-      /*
-	fprintf(stderr, "%s %s %08x %d\n",
-	     pw1->word,
-	     pw2->word, a2, r2);
-	fflush(stderr);
-      */
-      for(int w3 = w2+1; w3 < N; ++w3,++n3) {
-	pw3 = ALL_WORDS + WORDS[w3];
-	
+
+      partial4 = (s->skip[4] != NULL);
+      found4 = false;
+      for(int w4 = w3+1; w4 < N; ++w4,++s->n[4],skips_done(s, 4)) {
+	pw4 = ALL_WORDS + WORDS[w4];
+
 	// Check for a skip-to at this level
-	if (skip3 != NULL) {
+	if (s->skip[4] != NULL) {
 	  b_print_n_found = false;
-	  if (strcmp(pw3->word, skip3) < 0) {
+	  if (strcmp(pw4->word, s->skip[4]) < 0) {
 	    continue;
 	  } else {
-	    fprintf(stderr, "SKIP-TO(3): %s\n", pw3->word);
+	    fprintf(stderr, "SKIP-TO(4): %s\n", pw4->word);
 	    fflush(stderr);
-	    skip3 = NULL;
+	    if (strcmp(pw4->word, s->skip[4]) != 0) {
+	      end_skips_below(s, 4);
+	    }
+	    s->skip[4] = NULL;
 	  }
 	}
-	
-	if ((a2 & pw3->letters_mask) == 0) continue;
-	a3 = a2 & ~(pw3->letters_mask); // letter-bits remaining to be found
-	ci3 = a3 | level3_mask; // this loop iter and level state index into the pruning cache
-      
+
+	if ((a3 & pw4->letters_mask) == 0) continue;
+	a4 = a3 & ~(pw4->letters_mask); // letter-bits remaining to be found
+	ci4 = a4 | level4_mask; // this loop iter and level state index into the pruning cache
+
 	// If the pruning cache has marked this word or lower as producing no pangrams from
 	// this level, then continue to the next word.
-	if (PRUNE_CACHE[ci3] <= w3) {
-	  //fprintf(stderr, "HIT 3: %s\n", pw3->word);
+	if (cache_get(ci4) <= w4) {
+	  //fprintf(stderr, "HIT 4: %s\n", pw4->word);
 	  //fflush(stderr);
-	  ++h3;
+	  ++s->h[4];
 	  continue;
 	}
-      
-	r3 = count_letters(a3);
-	if (r3 > 15) continue;
-	if (r3 == 15) {
-	  v3 = count_vowels(a3);
-	  if (v3 < 3) continue;
+
+	r4 = count_letters(a4);
+	if (r4 > 10) continue;
+	if (r4 == 10) {
+	  v4 = count_vowels(a4);
+	  if (v4 < 2) continue;
 	}
-	
-	for(int w4 = w3+1; w4 < N; ++w4,++n4) {
-	  pw4 = ALL_WORDS + WORDS[w4];
-	  
+
+	partial5 = (s->skip[5] != NULL);
+	found5 = false;
+	for(int w5 = w4+1; w5 < N; ++w5,++s->n[5],skips_done(s, 5)) {
+	  pw5 = ALL_WORDS + WORDS[w5];
+
 	  // Check for a skip-to at this level
-	  if (skip4 != NULL) {
+	  if (s->skip[5] != NULL) {
 	    b_print_n_found = false;
-	    if (strcmp(pw4->word, skip4) < 0) {
+	    if (strcmp(pw5->word, s->skip[5]) < 0) {
 	      continue;
 	    } else {
-	      fprintf(stderr, "SKIP-TO(4): %s\n", pw4->word);
+	      fprintf(stderr, "SKIP-TO(5): %s\n", pw5->word);
 	      fflush(stderr);
-	      skip4 = NULL;
+	      if (strcmp(pw5->word, s->skip[5]) != 0) {
+	        end_skips_below(s, 5);
+	      }
+	      s->skip[5] = NULL;
 	    }
 	  }
-	  
-	  if ((a3 & pw4->letters_mask) == 0) continue;
-	  a4 = a3 & ~(pw4->letters_mask); // letter-bits remaining to be found
-	  ci4 = a4 | level4_mask; // this loop iter and level state index into the pruning cache
-      
+
+	  if ((a4 & pw5->letters_mask) == 0) continue;
+	  a5 = a4 & ~(pw5->letters_mask); // letter-bits remaining to be found
+	  ci5 = a5 | level5_mask; // this loop iter and level state index into the pruning cache
+
 	  // If the pruning cache has marked this word or lower as producing no pangrams from
 	  // this level, then continue to the next word.
-	  if (PRUNE_CACHE[ci4] <= w4) {
-	    //fprintf(stderr, "HIT 4: %s\n", pw4->word);
+	  if (cache_get(ci5) <= w5) {
+	    //fprintf(stderr, "HIT 5: %s\n", pw5->word);
 	    //fflush(stderr);
-	    ++h4;
+	    ++s->h[5];
 	    continue;
 	  }
-	  
-	  r4 = count_letters(a4);
-	  if (r4 > 10) continue;
-	  if (r4 == 10) {
-	    v4 = count_vowels(a4);
-	    if (v4 < 2) continue;
+
+	  r5 = count_letters(a5);
+	  if (r5 > 5) continue;
+	  if (r5 == 5) {
+	    v5 = count_vowels(a5);
+	    if (v5 < 1) continue;
 	  }
-	  
-	  for(int w5 = w4+1; w5 < N; ++w5,++n5) {
-	    pw5 = ALL_WORDS + WORDS[w5];
-	    
+
+	  partial6 = (s->skip[6] != NULL);
+	  found6 = false;
+	  for(int w6 = w5+1; w6 < N; ++w6,++s->n[6]) {
+	    pw6 = ALL_WORDS + WORDS[w6];
+
 	    // Check for a skip-to at this level
-	    if (skip5 != NULL) {
+	    if (s->skip[6] != NULL) {
 	      b_print_n_found = false;
-	      if (strcmp(pw5->word, skip5) < 0) {
+	      if (strcmp(pw6->word, s->skip[6]) < 0) {
 		continue;
 	      } else {
-		fprintf(stderr, "SKIP-TO(5): %s\n", pw5->word);
+		fprintf(stderr, "SKIP-TO(6): %s\n", pw6->word);
 		fflush(stderr);
-		skip5 = NULL;
+		s->skip[6] = NULL;
 	      }
 	    }
-	    
-	    if ((a4 & pw5->letters_mask) == 0) continue;
-	    a5 = a4 & ~(pw5->letters_mask); // letter-bits remaining to be found
-	    ci5 = a5 | level5_mask; // this loop iter and level state index into the pruning cache
-	    
-	    // If the pruning cache has marked this word or lower as producing no pangrams from
-	    // this level, then continue to the next word.
-	    if (PRUNE_CACHE[ci5] <= w5) {
-	      //fprintf(stderr, "HIT 5: %s\n", pw5->word);
-	      //fflush(stderr);
-	      ++h5;
-	      continue;
-	    }
-	    
-	    r5 = count_letters(a5);
-	    if (r5 > 5) continue;
-	    if (r5 == 5) {
-	      v5 = count_vowels(a5);
-	      if (v5 < 1) continue;
-	    }
-	    
-	    for(int w6 = w5+1; w6 < N; ++w6,++n6) {
-	      pw6 = ALL_WORDS + WORDS[w6];
-	      
-	      // Check for a skip-to at this level
-	      if (skip6 != NULL) {
-		b_print_n_found = false;
-		if (strcmp(pw6->word, skip6) < 0) {
-		  continue;
-		} else {
-		  fprintf(stderr, "SKIP-TO(6): %s\n", pw6->word);
-		  fflush(stderr);
-		  skip6 = NULL;
-		}
-	      }
-	      
-	      // Check for signal to exit gracefully.
-	      // Print this to both stderr and stdout?
-	      if (sighup_received) {
-		printf("LAST: %s %s %s %s %s %s\n",
-		       pw1->word,
-		       pw2->word,
-		       pw3->word,
-		       pw4->word,
-		       pw5->word,
-		       pw6->word);
-		exit(0);
-	      }
-	      
-	      // Check for signal to print some information and continue,
-	      // or to pause the search here (SIGUSR2) until signaled again.
-	      if (sigusr1_received || sigusr2_received) {
-		sigusr1_received = 0;
-		fprintf(stderr, "STACK: %s %s %s %s %s %s\n",
-			pw1->word,
-			pw2->word,
-			pw3->word,
-			pw4->word,
-			pw5->word,
-			pw6->word);
-		fprintf(stderr, "PRUNE HITS: %lu %lu %lu %lu %lu %lu\n", h1, h2, h3, h4, h5, h6);
-		fprintf(stderr, "COUNTS: %lu %lu %lu %lu %lu %lu\n", n1, n2, n3, n4, n5, n6);
-		fprintf(stderr, "DELTAS: %lu %lu %lu %lu %lu %lu\n", n1-ln1, n2-ln2, n3-ln3, n4-ln4, n5-ln5, n6-ln6);
-		fflush(stderr);
-		ln1=n1; ln2=n2; ln3=n3; ln4=n4; ln5=n5; ln6=n6;
-		if (sigusr2_received) {
-		  sigusr2_received = 0;
-		  fprintf(stderr, "PAUSED ... ");
-		  fflush(stderr);
-		  while (sigusr2_received == 0) {
-		    sleep(60); // signal should wake me up so it shouldn't matter how long I sleep
-		  }
-		  sigusr2_received = 0;
-		  fprintf(stderr, "RESUMING!\n");
-		  fflush(stderr);
-		}
-	      }
-	      
-	      if ((a5 & pw6->letters_mask) == 0) continue;
-	      a6 = a5 & ~(pw6->letters_mask); // letter-bits remaining to be found
-	      //ci6 = a6 | level6_mask; // this loop iter and level state index into the pruning cache NOT USED
-      
-
-	      if (a6 == 0) {
-		// We found a pangram.
-		++n_pangrams_found;
-		printf("%s %s %s %s %s %s\n",
-		       pw1->word,
-		       pw2->word,
-		       pw3->word,
-		       pw4->word,
-		       pw5->word,
-		       pw6->word);
-		fflush(stdout);
-
-		// Mark the level above this loop as having found a pangram down this path.
-		PRUNE_CACHE[ci5] = CACHE_PANGRAM_FOUND;
-		
-	      }  // end if found a pangram
-	    } // for w6
-
-	    // If the level below me found a pangram, then so did the level above me.
-	    if (PRUNE_CACHE[ci5] == CACHE_PANGRAM_FOUND) {
-	      PRUNE_CACHE[ci4] = CACHE_PANGRAM_FOUND;
-	    } else { // no pangram found for this situation at this level, from this word forward.
-	      PRUNE_CACHE[ci5] = w5;
+
+	    // Check for signals to exit gracefully, print some information, or pause.
+	    if (sighup_received || sigusr1_received || sigusr2_received || paused) {
+	      if (check_signals(s, pw1, pw2, pw3, pw4, pw5, pw6)) return; // PUNCH-OUT
 	    }
-	  } // for w5
+
+	    if ((a5 & pw6->letters_mask) == 0) continue;
+	    a6 = a5 & ~(pw6->letters_mask); // letter-bits remaining to be found
+
+	    if (a6 == 0) {
+	      // We found a pangram.
+	      ++n_pangrams_found;
+	      fprintf(s->out, "%s %s %s %s %s %s\n",
+		      pw1->word,
+		      pw2->word,
+		      pw3->word,
+		      pw4->word,
+		      pw5->word,
+		      pw6->word);
+	      fflush(s->out);
+
+	      // Mark the level above this loop as having found a pangram down this path.
+	      found6 = true;
+
+	    }  // end if found a pangram
+	  } // for w6
 
 	  // If the level below me found a pangram, then so did the level above me.
-	  if (PRUNE_CACHE[ci4] == CACHE_PANGRAM_FOUND) {
-	    PRUNE_CACHE[ci3] = CACHE_PANGRAM_FOUND;
-	  } else { // no pangram found for this situation at this level, from this word forward.
-	    PRUNE_CACHE[ci4] = w4;
+	  if (found6) {
+	    found5 = true;
+	  } else if (!partial6) { // no pangram found for this situation at this level, from this word forward.
+	    cache_min(ci5, w5);
 	  }
-	} // for w4
-	
+	  partial5 = partial5 || partial6;
+	} // for w5
+
 	// If the level below me found a pangram, then so did the level above me.
-	if (PRUNE_CACHE[ci3] == CACHE_PANGRAM_FOUND) {
-	  PRUNE_CACHE[ci2] = CACHE_PANGRAM_FOUND;
-	} else { // no pangram found for this situation at this level, from this word forward.
-	  PRUNE_CACHE[ci3] = w3;
+	if (found5) {
+	  found4 = true;
+	} else if (!partial5) { // no pangram found for this situation at this level, from this word forward.
+	  cache_min(ci4, w4);
 	}
-      } // for w3
-      
+	partial4 = partial4 || partial5;
+      } // for w4
+
       // If the level below me found a pangram, then so did the level above me.
-      if (PRUNE_CACHE[ci2] == CACHE_PANGRAM_FOUND) {
-	PRUNE_CACHE[ci1] = CACHE_PANGRAM_FOUND;
-      } else { // no pangram found for this situation at this level, from this word forward.
-	PRUNE_CACHE[ci2] = w2;
+      if (found4) {
+	found3 = true;
+      } else if (!partial4) { // no pangram found for this situation at this level, from this word forward.
+	cache_min(ci3, w3);
+      }
+      partial3 = partial3 || partial4;
+    } // for w3
+
+    // Unless the level below me found a pangram, no pangram found for this situation at this level,
+    // from this word forward.
+    if (!found3 && !partial3) {
+      cache_min(ci2, w2);
+    }
+  } // for w2
+
+  // If none of the nested loops had SKIPs, then print
+  // the number of pangrams found for this word.
+  if (b_print_n_found) {
+    fprintf(s->out, "# %s = %u\n", pw1->word, n_pangrams_found);
+    fflush(s->out);
+  }
+}
+
+// Searching with threads (-t): each thread takes the next head word from the list of them
+// sorted by their share of the whole search (from ./WORD-PERCENT, if there is one), biggest
+// first, so no big one is left to hold up the end. Each thread writes the output of its head
+// words to a spill file of its own, as it goes, and each head word's output is copied from
+// there to stdout once all the head words before it are done, so the output is just the same
+// as one thread's, and nothing waits in memory. The spill files are removed at the end, but
+// left in $TMPDIR (or /tmp) if pangram2 crashes or is killed, with what had been found. On
+// SIGHUP, the output stops at the first head word not done, with what was found of it and
+// where it stopped, in a LAST: line, as with one thread.
+typedef struct
+{
+  int thread; // the thread whose spill file has the output of the head word
+  off_t start; // where it is in the spill file, once it's done or stopped
+  off_t size;
+  bool done;
+  char *last; // the LAST: line, if it stopped
+} HeadWordOutput;
+
+int *tasks; // the head words, biggest first
+int n_tasks;
+int next_task = 0;
+int n_running;
+int first_w1; // the first head word, the one the words to skip to below it are for
+char *first_skips[7];
+double *task_percent;
+HeadWordOutput *outputs;
+int next_to_print;
+Searcher *searchers; // one per thread
+FILE **spill_files;
+char **spill_paths;
+pthread_mutex_t print_mutex = PTHREAD_MUTEX_INITIALIZER;
+
+// The index in WORDS of the word, or -1.
+int find_word(const char *word)
+{
+  int lo = 0, hi = N - 1;
+  while (lo <= hi) {
+    int mid = (lo + hi) / 2;
+    int c = strcmp(ALL_WORDS[WORDS[mid]].word, word);
+    if (c == 0) return mid;
+    if (c < 0) lo = mid + 1; else hi = mid - 1;
+  }
+  return -1;
+}
+
+int compare_tasks(const void *a, const void *b)
+{
+  int wa = *(const int *)a, wb = *(const int *)b;
+  if (task_percent[wa] != task_percent[wb]) return (task_percent[wa] > task_percent[wb]) ? -1 : 1;
+  return wa - wb;
+}
+
+void order_tasks(int first)
+{
+  task_percent = calloc(N, sizeof(double));
+  FILE *f = fopen("./WORD-PERCENT", "r");
+  if (f != NULL) {
+    char word[16];
+    double percent;
+    while (fscanf(f, "%15s %lf", word, &percent) == 2) {
+      int w = find_word(word);
+      if (w >= 0) task_percent[w] = percent;
+    }
+    fclose(f);
+  }
+  n_tasks = N - first;
+  tasks = malloc(n_tasks * sizeof(int));
+  for (int t = 0; t < n_tasks; ++t) {
+    tasks[t] = first + t;
+  }
+  qsort(tasks, n_tasks, sizeof(int), compare_tasks);
+}
+
+// Copy the output of a head word from its spill file to stdout.
+void print_spilled(HeadWordOutput *o)
+{
+  char buffer[65536];
+  int fd = fileno(spill_files[o->thread]);
+  for (off_t at = o->start, end = o->start + o->size; at < end; ) {
+    ssize_t n = pread(fd, buffer, (end - at < sizeof(buffer)) ? end - at : sizeof(buffer), at);
+    if (n <= 0) {
+      perror(spill_paths[o->thread]);
+      exit(1);
+    }
+    fwrite(buffer, 1, n, stdout);
+    at += n;
+  }
+}
+
+// Note where the output of a head word is, and print all the outputs that are next in order.
+void finish_head_word(Searcher *s, off_t start, off_t size)
+{
+  pthread_mutex_lock(&print_mutex);
+  HeadWordOutput *o = outputs + s->w1;
+  o->thread = s - searchers;
+  o->start = start;
+  o->size = size;
+  if (s->stopped) {
+    o->last = strdup(s->last);
+  } else {
+    o->done = true;
+  }
+  while (next_to_print < N && outputs[next_to_print].done) {
+    print_spilled(outputs + next_to_print);
+    ++next_to_print;
+  }
+  fflush(stdout);
+  pthread_mutex_unlock(&print_mutex);
+}
+
+void *search_thread(void *arg)
+{
+  Searcher *s = arg;
+  while (!sighup_received) {
+    int t = __atomic_fetch_add(&next_task, 1, __ATOMIC_RELAXED);
+    if (t >= n_tasks) break;
+    int w1 = tasks[t];
+    s->out = spill_files[s - searchers];
+    off_t start = ftello(s->out);
+    for (int k = 2; k <= 6; ++k) {
+      s->skip[k] = (w1 == first_w1) ? first_skips[k] : NULL;
+    }
+    s->stopped = false;
+    ++s->n[1];
+    search_head_word(s, w1);
+    if (fflush(s->out) != 0) {
+      perror(spill_paths[s - searchers]);
+      exit(1);
+    }
+    finish_head_word(s, start, ftello(s->out) - start);
+  }
+  __atomic_fetch_sub(&n_running, 1, __ATOMIC_RELAXED);
+  return NULL;
+}
+
+void search_threads(int first, char **skips)
+{
+  first_w1 = first;
+  memcpy(first_skips, skips, sizeof(first_skips));
+  order_tasks(first);
+  outputs = calloc(N, sizeof(HeadWordOutput));
+  next_to_print = first;
+
+  searchers = calloc(n_threads, sizeof(Searcher));
+  spill_files = calloc(n_threads, sizeof(FILE *));
+  spill_paths = calloc(n_threads, sizeof(char *));
+  const char *tmpdir = (getenv("TMPDIR") != NULL) ? getenv("TMPDIR") : "/tmp";
+  for (int i = 0; i < n_threads; ++i) {
+    spill_paths[i] = malloc(strlen(tmpdir) + 64);
+    sprintf(spill_paths[i], "%s/pangram2-%d-%d.XXXXXX", tmpdir, (int)getpid(), i);
+    int fd = mkstemp(spill_paths[i]);
+    if (fd < 0 || (spill_files[i] = fdopen(fd, "w+")) == NULL) {
+      perror(spill_paths[i]);
+      exit(1);
+    }
+    fprintf(stderr, "SPILL FILE: %s\n", spill_paths[i]);
+  }
+  fflush(stderr);
+  pthread_t *threads = malloc(n_threads * sizeof(pthread_t));
+  n_running = n_threads;
+  for (int i = 0; i < n_threads; ++i) {
+    pthread_create(threads + i, NULL, search_thread, searchers + i);
+  }
+
+  // Handle the signals to print some information, and to pause, while the threads search.
+  while (__atomic_load_n(&n_running, __ATOMIC_RELAXED) > 0) {
+    sleep(1);
+    if (sigusr1_received || sigusr2_received) {
+      sigusr1_received = 0;
+      fprintf(stderr, "WORKING:");
+      for (int i = 0; i < n_threads; ++i) {
+	fprintf(stderr, " %s", ALL_WORDS[WORDS[__atomic_load_n(&searchers[i].w1, __ATOMIC_RELAXED)]].word);
       }
-    } // for w2
+      fprintf(stderr, "\n");
+      print_counts(searchers, n_threads);
+      if (sigusr2_received) {
+	sigusr2_received = 0;
+	paused = !paused;
+	fprintf(stderr, paused ? "PAUSED ... " : "RESUMING!\n");
+	fflush(stderr);
+      }
+    }
+  }
+  for (int i = 0; i < n_threads; ++i) {
+    pthread_join(threads[i], NULL);
+  }
+
+  if (sighup_received && next_to_print < N) {
+    HeadWordOutput *o = outputs + next_to_print;
+    if (o->last != NULL) {
+      print_spilled(o);
+      printf("%s\n", o->last);
+    } else {
+      printf("LAST: %s\n", ALL_WORDS[WORDS[next_to_print]].word);
+    }
+  }
+  fflush(stdout);
+
+  // Everything in the spill files is printed now.
+  for (int i = 0; i < n_threads; ++i) {
+    fclose(spill_files[i]);
+    unlink(spill_paths[i]);
+  }
+}
+
+void main(int argc, char **argv)
+{
+  // Handle SIGHUP to exit gracefully.
+  signal(SIGHUP, sighup_handler);
 
-    // If none of the nested loops had SKIPs, then print
-    // the number of pangrams found for this word.
-    if (b_print_n_found) {
-      printf("# %s = %u\n", pw1->word, n_pangrams_found);
-      fflush(stdout);
+  // Handle SIGUSR1 to print some information.
+  signal(SIGUSR1, sigusr1_handler);
+
+  // Handle SIGUSR2 to pause and restart the search.
+  signal(SIGUSR2, sigusr2_handler);
+
+  // Set up the anagrams_index for each WordleWord in ALL_WORDS.
+  init_anagrams_indices();
+
+  // The zero'th element of the ALL_WORDS array is empty.
+  // This lets us use word index zero to mean "no word" analogous to '\0' meaning "no char"
+  // We can also call this the null word (analogous to null char)
+
+  char *skip[7] = {NULL, NULL, NULL, NULL, NULL, NULL, NULL};
+  char *cache_file = NULL;
+
+  // Options: -c cache-file, -t threads.
+  while (argc > 2 && argv[1][0] == '-') {
+    if (strcmp(argv[1], "-c") == 0) {
+      cache_file = argv[2];
+    } else if (strcmp(argv[1], "-t") == 0 && atoi(argv[2]) > 0) {
+      n_threads = atoi(argv[2]);
+    } else {
+      break;
+    }
+    argc -= 2;
+    argv += 2;
+  }
+  if (argc > 1 && argv[1][0] == '-') {
+    fprintf(stderr, "Usage: pangram2 [-c cache-file] [-t threads] [skip-to words ...]\n");
+    exit(1);
+  }
+
+#ifdef SPARSE_CACHE
+  init_sparse_cache();
+#endif
+
+  // Use the cache in the file given with -c, or init the cache with the NO INFO marker.
+  if (cache_file != NULL) {
+    open_prune_cache(cache_file);
+    atexit(sync_prune_cache);
+  } else {
+    PRUNE_CACHE = malloc(CACHE_BYTES);
+    for (int i = 0; i < CACHE_SIZE; ++i) {
+      PRUNE_CACHE[i] = CACHE_NO_INFO;
+    }
+  }
+
+  // Look for words to skip ahead to on command line.
+  for (int k = 1; k <= 6 && k < argc && strlen(argv[k]) == 5; ++k) {
+    skip[k] = argv[k];
+  }
+
+  // Find the first head word.
+  int first = 0;
+  if (skip[1] != NULL) {
+    while (first < N && strcmp(ALL_WORDS[WORDS[first]].word, skip[1]) < 0) {
+      ++first;
+    }
+    if (first < N) {
+      fprintf(stderr, "SKIP-TO(1): %s\n", ALL_WORDS[WORDS[first]].word);
+      fflush(stderr);
     }
+    if (first >= N || strcmp(ALL_WORDS[WORDS[first]].word, skip[1]) != 0) {
+      memset(skip, 0, sizeof(skip));
+    }
+    skip[1] = NULL;
+  }
+
+  if (n_threads > 1) {
+    search_threads(first, skip);
+    exit(0);
+  }
+
+  Searcher s;
+  memset(&s, 0, sizeof(s));
+  memcpy(s.skip, skip, sizeof(s.skip));
+  s.out = stdout;
+  s.n[1] = first;
+  for(int w1 = first; w1 < N; ++w1,++s.n[1],skips_done(&s, 1)) {
+    search_head_word(&s, w1);
 
     // TEMP EXIT AFTER ONE WORD FOR BENCHMARKING
-    //fprintf(stderr, "PRUNE HITS: %lu %lu %lu %lu %lu %lu\n", h1, h2, h3, h4, h5, h6);
-    //fprintf(stderr, "COUNTS: %lu %lu %lu %lu %lu %lu\n", n1, n2, n3, n4, n5, n6);
+    //print_counts(&s, 1);
     //exit(0);
-    
+
   } // for w1
+  exit(0); // main is void, so say it went well
 }
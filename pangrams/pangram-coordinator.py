@@ -0,0 +1,317 @@
+#!/usr/bin/python3
+# Copyright (C) 2025 Dez Moleski dez@moleski.com
+# MIT License: All uses allowed with attribution.
+#
+# Search coordinator: runs the pangram search over a range of head words as
+# shards in parallel searcher processes, keeps checkpoints of how far each one
+# got, restarts the ones that fail from their last checkpoint, and writes each
+# finished shard to its data file, data/<letter>/FIRST-LAST, for fix-counts.
+#
+# The searcher is pangram.c or p2/pangram2.c (./pangram2 by default): it's
+# started with the words to skip to as its arguments, prints pangrams and
+# "# WORD = n" lines to stdout as it goes, prints "STACK: w1 .. w6" to stderr
+# on SIGUSR1, and "LAST: w1 .. w6" to stdout on SIGHUP before exiting. Here the
+# processes are local, standing in for the nodes of a distributed search.
+#
+# The shards are ranges of head words within one letter, cut so that they are
+# about the same share of the whole search by the WORD PERCENT lines in
+# ./WORD-PERCENT (made by word-percent from word-percentages.txt).
+#
+# A checkpoint is the point in the search order to resume from, as a list of
+# words: the next head word after a "# WORD = n" line, or the six words of a
+# STACK: or LAST: line. Searchers print pangrams in search order, as their
+# words in sorted order, so everything a shard printed before its checkpoint
+# is kept and anything after it is dropped when the shard is restarted from
+# there. A shard restarted within a head word gets no counts line for that
+# word, which is one of the things fix-counts fixes.
+#
+# The state of all the shards is kept in ./SEARCH-STATE.json, rewritten as
+# checkpoints come in, and the searchers' output in ./search/. If the
+# coordinator stops (Ctrl-C sends SIGHUP to all the searchers first) just run
+# it again with no range to carry on where it left off.
+#
+import sys
+import os
+import os.path
+import json
+import signal
+import subprocess
+import time
+from pangram_lexicon import Lexicon
+from pangram_scan import processes_arg
+
+USAGE = "Usage: pangram-coordinator [-j processes] [-n shards] [-s searcher] [first-word last-word]"
+ALL_FILE = "./ALL"
+WORD_PERCENT_FILE = "./WORD-PERCENT"
+STATE_FILE = "./SEARCH-STATE.json"
+WORK_DIR = "./search"
+DATA_DIR = "./data"
+DEFAULT_SEARCHER = "./pangram2"
+
+POLL_SECONDS = 2
+CHECKPOINT_SECONDS = 60 # how often to ask the searchers for a STACK: line
+MAX_ATTEMPTS = 5        # runs of a shard before giving up on it
+
+# Sorts after any word, for the place of a "# WORD = n" line after WORD's pangrams.
+AFTER_WORDS = '~'
+
+def line_key(line_list: list):
+   """ The place in the search order of a pangram or counts line, or None for any other line """
+   if len(line_list) == 6 and all([w.isalpha() for w in line_list]):
+      return line_list
+   if len(line_list) == 4 and line_list[0] == '#' and line_list[2] == '=':
+      return [line_list[1].strip('[]').split('|')[0], AFTER_WORDS]
+   return None
+
+def load_word_percents(words: list) -> dict:
+   """ Each head word's percent of the whole search, from WORD-PERCENT, or all the same if there's no file """
+   if not os.path.isfile(WORD_PERCENT_FILE):
+      print("No", WORD_PERCENT_FILE, "file, all head words weighted the same.", file=sys.stderr, flush=True)
+      return {w: 100.0 / len(words) for w in words}
+   word_percent = dict()
+   with open(WORD_PERCENT_FILE) as f:
+      for line in f:
+         wp = line.split()
+         if len(wp) == 2:
+            word_percent[wp[0]] = float(wp[1])
+   return {w: word_percent.get(w, 0.0) for w in words}
+
+def plan_shards(words: list, word_percent: dict, n_shards: int) -> list:
+   """ Cut the head words into about n_shards ranges within each letter, of about the same percent each """
+   total = sum([word_percent[w] for w in words]) or 1.0
+   by_letter = dict()
+   for w in words:
+      by_letter.setdefault(w[0], list()).append(w)
+   shards = list()
+   for letter in sorted(by_letter.keys()):
+      letter_words = by_letter[letter]
+      letter_percent = sum([word_percent[w] for w in letter_words])
+      n_letter = max(1, min(len(letter_words), round(n_shards * letter_percent / total)))
+      share = letter_percent / n_letter
+      start = 0
+      done = 0.0
+      n_closed = 0
+      for (i, w) in enumerate(letter_words):
+         done += word_percent[w]
+         is_last = i == len(letter_words) - 1
+         # Close the shard once it has its share of the letter, leaving at least a word per shard to come.
+         if is_last or (done >= share * (n_closed + 1) and len(letter_words) - i - 1 >= n_letter - n_closed - 1):
+            shard_words = letter_words[start:i+1]
+            shards.append({'letter': letter, 'first': shard_words[0], 'last': shard_words[-1],
+                           'percent': sum([word_percent[sw] for sw in shard_words]),
+                           'status': 'pending', 'checkpoint': None, 'attempts': 0})
+            start = i + 1
+            n_closed += 1
+   return shards
+
+def shard_name(shard: dict) -> str:
+   """ The data file name of the shard, FIRST-LAST or just WORD """
+   if shard['first'] == shard['last']:
+      return shard['first']
+   return f'{shard["first"]}-{shard["last"]}'
+
+def save_state(state: dict):
+   # Write next to the final path and rename, so a half-written state is never used.
+   with open(STATE_FILE + '.tmp', 'w') as f:
+      json.dump(state, f, indent=1)
+   os.replace(STATE_FILE + '.tmp', STATE_FILE)
+
+def keep_lines_before(path: str, checkpoint: list):
+   """ Rewrite the searcher output file with only its pangram and counts lines before the checkpoint """
+   if not os.path.isfile(path):
+      return # PUNCH-OUT
+   with open(path, 'r') as f, open(path + '.tmp', 'w') as out:
+      for line in f:
+         key = line_key(line.split())
+         if key is not None and (checkpoint is None or key < checkpoint):
+            out.write(line)
+   os.replace(path + '.tmp', path)
+
+class ShardRun:
+   """ A searcher process running one shard, and what's been read of its output so far """
+
+   def __init__(self, shard: dict, searcher: str, next_word: dict):
+      self.shard = shard
+      self.next_word = next_word
+      name = shard_name(shard)
+      self.out_path = os.path.join(WORK_DIR, name + '.out')
+      self.err_path = os.path.join(WORK_DIR, name + '.err')
+      # Drop anything the last run printed after the checkpoint, then resume from it.
+      checkpoint = shard['checkpoint']
+      if checkpoint is None:
+         keep_lines_before(self.out_path, [shard['first']])
+         args = [shard['first']]
+      else:
+         keep_lines_before(self.out_path, checkpoint)
+         args = checkpoint
+      shard['attempts'] += 1
+      shard['status'] = 'running'
+      self.out_pos = os.path.getsize(self.out_path) if os.path.isfile(self.out_path) else 0
+      self.err_pos = os.path.getsize(self.err_path) if os.path.isfile(self.err_path) else 0
+      # In its own session, so a Ctrl-C of the coordinator doesn't kill it before it's sent SIGHUP.
+      with open(self.out_path, 'a') as out, open(self.err_path, 'a') as err:
+         self.process = subprocess.Popen([searcher] + args, stdout=out, stderr=err, start_new_session=True)
+      self.past_last = False
+      print(f'START {name}: {searcher} {" ".join(args)} (attempt {shard["attempts"]})', file=sys.stderr, flush=True)
+
+   def read_new_lines(self, path: str, pos: int) -> (list,int):
+      """ The complete lines of the file from pos on, and the position after them """
+      with open(path, 'r') as f:
+         f.seek(pos)
+         text = f.read()
+      end = text.rfind('\n') + 1
+      return (text[:end].splitlines(), pos + len(text[:end].encode()))
+
+   def checkpoint(self, words: list):
+      """ Record a checkpoint, or notice that the searcher went past the shard's last head word """
+      if words[0] > self.shard['last']:
+         self.past_last = True
+      elif self.shard['checkpoint'] is None or words > self.shard['checkpoint']:
+         self.shard['checkpoint'] = words
+
+   def poll(self) -> bool:
+      """ Read the searcher's new output for checkpoints. Returns True if the shard is done. """
+      (lines, self.out_pos) = self.read_new_lines(self.out_path, self.out_pos)
+      for line in lines:
+         line_list = line.split()
+         if len(line_list) == 7 and line_list[0] == 'LAST:':
+            self.checkpoint(line_list[1:])
+            continue
+         key = line_key(line_list)
+         if key is not None and key[1] == AFTER_WORDS:
+            # A head word is finished, resume from the next one.
+            next_word = self.next_word.get(key[0])
+            self.checkpoint([next_word] if next_word is not None else [AFTER_WORDS])
+         elif key is not None and key[0] > self.shard['last']:
+            self.past_last = True
+      (lines, self.err_pos) = self.read_new_lines(self.err_path, self.err_pos)
+      for line in lines:
+         line_list = line.split()
+         if len(line_list) == 7 and line_list[0] == 'STACK:':
+            self.checkpoint(line_list[1:])
+      return self.past_last
+
+   def stop(self, sig=signal.SIGKILL):
+      if self.process.poll() is None:
+         self.process.send_signal(sig)
+      self.process.wait()
+
+def finish_shard(shard: dict, lexicon: Lexicon):
+   """ Write the shard's pangrams and counts lines to its data file, with the anagrams like check-pangrams """
+   name = shard_name(shard)
+   out_path = os.path.join(WORK_DIR, name + '.out')
+   data_path = os.path.join(DATA_DIR, shard['letter'], name)
+   os.makedirs(os.path.dirname(data_path), exist_ok=True)
+   end = [shard['last'], AFTER_WORDS, AFTER_WORDS]
+   with open(out_path, 'r') as f, open(data_path + '.tmp', 'w') as out:
+      for line in f:
+         line_list = line.split()
+         key = line_key(line_list)
+         if key is None or key > end:
+            continue
+         if key[1] == AFTER_WORDS:
+            (anagrams, _) = lexicon.format_anagrams(key[0])
+            print(f'# {anagrams} = {line_list[3]}', file=out)
+         else:
+            print(' '.join([lexicon.format_anagrams(w)[0] for w in line_list]) + ' ', file=out)
+   os.replace(data_path + '.tmp', data_path)
+   shard['status'] = 'done'
+   print(f'DONE {name}: {data_path}', file=sys.stderr, flush=True)
+
+if __name__ == "__main__":
+   (processes, args) = processes_arg(sys.argv, USAGE)
+   n_shards = None
+   searcher = DEFAULT_SEARCHER
+   while len(args) >= 2 and args[0] in ('-n', '-s'):
+      if args[0] == '-n':
+         if not args[1].isdigit() or int(args[1]) < 1:
+            exit(USAGE)
+         n_shards = int(args[1])
+      else:
+         searcher = args[1]
+      args = args[2:]
+   if len(args) not in (0, 2):
+      exit(USAGE)
+   if processes is None:
+      processes = os.cpu_count() or 1
+
+   print("Loading lexicon of all valid guesses file:", ALL_FILE, file=sys.stderr, flush=True, end=' ')
+   lexicon = Lexicon.open(ALL_FILE)
+   no_anagrams = lexicon.no_anagrams() # sorted
+   next_word = {w: no_anagrams[i+1] for (i, w) in enumerate(no_anagrams[:-1])}
+   print("N no-anagrams =", len(no_anagrams), file=sys.stderr, flush=True)
+
+   if len(args) == 2:
+      if os.path.isfile(STATE_FILE):
+         exit(f'ERROR: {STATE_FILE} exists, run with no range to carry on with it, or remove it.')
+      (first, last) = [w.upper() for w in args]
+      for w in (first, last):
+         if w not in next_word and w != no_anagrams[-1]:
+            exit(f'ERROR: {w} is not in the no-anagrams word list.')
+      words = [w for w in no_anagrams if first <= w <= last]
+      state = {'searcher': searcher, 'shards': plan_shards(words, load_word_percents(words), n_shards or processes)}
+      for shard in state['shards']:
+         if os.path.exists(os.path.join(DATA_DIR, shard['letter'], shard_name(shard))):
+            exit(f'ERROR: data file {shard_name(shard)} already exists.')
+   elif os.path.isfile(STATE_FILE):
+      with open(STATE_FILE) as f:
+         state = json.load(f)
+      if searcher == DEFAULT_SEARCHER:
+         searcher = state['searcher']
+      for shard in state['shards']:
+         if shard['status'] == 'running':
+            shard['status'] = 'pending' # it was running when the coordinator stopped
+   else:
+      exit(USAGE)
+   os.makedirs(WORK_DIR, exist_ok=True)
+   save_state(state)
+   print(f'Shards: {len(state["shards"])}, searcher: {searcher}, processes: {processes}', file=sys.stderr, flush=True)
+
+   runs = list()
+   last_checkpoint_time = time.monotonic()
+   try:
+      while True:
+         pending = [s for s in state['shards'] if s['status'] == 'pending']
+         for shard in [s for s in pending if s['checkpoint'] is not None and s['checkpoint'][0] > s['last']]:
+            # Stopped after it finished, before it was written to its data file.
+            finish_shard(shard, lexicon)
+            pending.remove(shard)
+         while len(runs) < processes and len(pending) > 0:
+            runs.append(ShardRun(pending.pop(0), searcher, next_word))
+         if len(runs) == 0:
+            break
+         save_state(state)
+         time.sleep(POLL_SECONDS)
+
+         if time.monotonic() - last_checkpoint_time >= CHECKPOINT_SECONDS:
+            for run in runs:
+               if run.process.poll() is None:
+                  run.process.send_signal(signal.SIGUSR1)
+            last_checkpoint_time = time.monotonic()
+
+         for run in list(runs):
+            exited = run.process.poll() is not None
+            if run.poll() or (exited and run.shard['last'] == no_anagrams[-1] and run.process.returncode >= 0):
+               # Past the shard's last head word, or finished the whole word list.
+               run.stop()
+               run.poll()
+               finish_shard(run.shard, lexicon)
+               runs.remove(run)
+            elif exited:
+               shard = run.shard
+               runs.remove(run)
+               shard['status'] = 'pending' if shard['attempts'] < MAX_ATTEMPTS else 'failed'
+               print(f'FAILED {shard_name(shard)}: exit status {run.process.returncode}, '
+                     f'checkpoint {shard["checkpoint"]}', file=sys.stderr, flush=True)
+   except KeyboardInterrupt:
+      # Stop the searchers so that they print their LAST: lines, and keep those as checkpoints.
+      for run in runs:
+         run.stop(signal.SIGHUP)
+         run.poll()
+         run.shard['status'] = 'pending'
+      print("Stopped, run again with no range to carry on.", file=sys.stderr, flush=True)
+   save_state(state)
+
+   n_done = sum([1 for s in state['shards'] if s['status'] == 'done'])
+   n_failed = sum([1 for s in state['shards'] if s['status'] == 'failed'])
+   print(f'Shards done: {n_done} / {len(state["shards"])}, failed: {n_failed}', file=sys.stderr, flush=True)
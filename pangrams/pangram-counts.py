@@ -9,29 +9,138 @@ from glob import glob
 import datetime
 import json
 import os.path
+import math
+import hashlib
+from pangram_lexicon import Lexicon
+from pangram_scan import cached_scan, ScanCache, data_files, file_letter, processes_arg
+
+# We only need to keep individual WORD-PERCENT items for words starting
+# with letters less than our "done from here on..." letter.
+DONE_FROM_LETTER = 'H'
+
+# Counts of each data file are cached here, and only recounted when the file changes.
+# Bump COUNTS_VERSION whenever count_file() changes what it counts.
+CACHE_FILE = "./PANGRAM-COUNTS.cache.json"
+COUNTS_VERSION = 1
+
+# Words listed with the exact counts, like the top 50 list in the README.
+N_TOP_EXACT = 50
+
+def count_exact(item_words: list, answer_set: set, exact_counts: dict) -> int:
+   """ Add the exact counts of one line's words to exact_counts, word -> [pangrams, solution pangrams].
+   Returns how many of the pangrams the line expands to contain a solution.
+
+   The line expands to the product of the sizes of its items (single words are
+   items of size one), and a word of item j is in every expansion that picks it
+   from item j: the product of the sizes of the other items. The expansions
+   without any solution pick a non-solution from every item, so a word that is
+   not itself a solution is in the product of the other items' sizes, less the
+   product of their numbers of non-solutions, solution-bearing pangrams.
+   """
+   sizes = [len(words) for words in item_words]
+   non_solutions = [len([w for w in words if not w in answer_set]) for words in item_words]
+   for (j, words) in enumerate(item_words):
+      n_with_word = math.prod(sizes[0:j] + sizes[j+1:])
+      n_without_solution = math.prod(non_solutions[0:j] + non_solutions[j+1:])
+      for w in words:
+         c = exact_counts.get(w)
+         if c is None:
+            c = [0, 0]
+            exact_counts[w] = c
+         c[0] += n_with_word
+         c[1] += n_with_word if w in answer_set else n_with_word - n_without_solution
+   return math.prod(sizes) - math.prod(non_solutions)
+
+def count_file(filepath: str, context: tuple) -> dict:
+   """ The counts from one data file, to be merged in file order by the main process """
+   (answer_set, exact) = context
+   counts = dict()
+   counts['percent_words'] = list() # key words of '#' lines before DONE_FROM_LETTER, in order
+   counts['n_base'] = 0
+   counts['n_expanded'] = 0
+   counts['head_runs'] = list() # [head word, pangrams] for each run of lines with the same head word
+   counts['word_count'] = dict()
+   counts['exact_counts'] = dict()
+   counts['n_solution_pangrams'] = 0
+   counts['exact'] = exact # whether exact_counts and n_solution_pangrams were counted
+   words_used = set()
+   answers_used = set()
+   word_count = counts['word_count']
+   with open(filepath, 'r') as f:
+      # Read each line and split first into line_list array.
+      # Anagrams within the line are like: '[VIGOR|VIRGO]'
+      for line in f:
+         line_list = line.split()
+         if line_list[0] == '#':
+            # For lines that start with '#', get the key word
+            # which is either by itself, or the first word of
+            # an anagram set like '[VIRGO|VIGOR]'
+            word_or_anagram = line_list[1]
+            if word_or_anagram[0] == '[':
+               word = word_or_anagram[1:6]
+            else:
+               word = word_or_anagram
+            if word[0] < DONE_FROM_LETTER:
+               counts['percent_words'].append(word)
+         else:
+            counts['n_base'] += 1
+
+            # Check if this is a new head word, and start a new run for it if so.
+            head_runs = counts['head_runs']
+            if len(head_runs) == 0 or line_list[0] != head_runs[-1][0]:
+               head_runs.append([line_list[0], 0])
+
+            # Visit each word or anagram set in the line, and
+            # accumulate the words into our words_used set.
+            # Also count how many pangrams are generated by expanding any anagrams.
+            count_this_pangram = 1
+            item_words = list()
+            for item in line_list:
+               # If it's five letters, this item is a single word
+               if len(item) == 5:
+                  item_words.append([item])
+                  words_used.add(item)
+                  word_count[item] = word_count.get(item, 0) + 1
+                  if item in answer_set:
+                     answers_used.add(item)
+               else:
+                  # It's anagrams like '[VIGOR|VIRGO]', so trim and split it into words.
+                  stripped = item.strip('[]')
+                  words = stripped.split('|')
+                  item_words.append(words)
+                  word_count[words[0]] = word_count.get(words[0], 0) + 1
+                  count_this_pangram *= len(words)
+                  for w in words:
+                     words_used.add(w)
+                     if w in answer_set:
+                        answers_used.add(item)
+            head_runs[-1][1] += count_this_pangram
+            if exact:
+               counts['n_solution_pangrams'] += count_exact(item_words, answer_set, counts['exact_counts'])
+            counts['n_expanded'] += count_this_pangram
+   counts['words_used'] = sorted(words_used)
+   counts['answers_used'] = sorted(answers_used)
+   return counts
 
 if __name__ == "__main__":
-   if len(sys.argv) != 1:
-      exit("Usage: pangram-counts")
+   # With -x, also count exactly how many of the fully expanded pangrams, and how many
+   # of those containing a solution, contain each word. The top words by solution-bearing
+   # pangrams are printed to stdout as a list like the one in the README.
+   USAGE = "Usage: pangram-counts [-j processes] [-x]"
+   (processes, args) = processes_arg(sys.argv, USAGE)
+   exact = args == ['-x']
+   if len(args) != 0 and not exact:
+      exit(USAGE)
    
-   # Read ALL GUESSES file
+   # Load the lexicon of the ALL GUESSES file, with the solutions from the ANSWERS file flagged
    ALL_FILE = "./ALL"
-   print("Reading all valid guesses file:", ALL_FILE, file=sys.stderr, flush=True, end=' ')
-   valid_guesses = WordList.from_file(ALL_FILE)
-   valid_guesses.sort()
-   print("N =", len(valid_guesses), file=sys.stderr, flush=True)
-   
-   # Read ANSWERS
    ANSWERS_FILE = "./ANSWERS"
-   print("Reading answers file:", ANSWERS_FILE, file=sys.stderr, flush=True, end=' ')
-   answers = WordList.from_file(ANSWERS_FILE)
-   answers.sort()
-   print("N =", len(answers), file=sys.stderr, flush=True)
+   print("Loading lexicon of all valid guesses file:", ALL_FILE, file=sys.stderr, flush=True, end=' ')
+   lexicon = Lexicon.open(ALL_FILE, ANSWERS_FILE)
+   answers = lexicon.answers()
+   print("N =", len(lexicon), "solutions =", len(answers), file=sys.stderr, flush=True)
 
    # Read WORD-PERCENT list and build up the word_percent dict.
-   # We only need to keep individual items for words starting
-   # with letters less than our "done from here on..." letter.
-   DONE_FROM_LETTER = 'H'
    word_percent = dict()
    WORD_PERCENT_FILE = "./WORD-PERCENT"
    done_percent = 0.0
@@ -48,11 +157,11 @@ if __name__ == "__main__":
                done_percent += percent
    print(f'{done_percent:.2}%', file=sys.stderr, flush=True)
    
-   # Visit each pangram data file
+   # Count each pangram data file in parallel, and merge the counts in file order.
    print("Scanning data files: ", file=sys.stderr, flush=True, end='')
-   all_pgrams = list()
-   all_words = WordList()
-   answers_used = WordList()
+   n_base_pangrams = 0
+   all_words = set()
+   answers_used = set()
    total_pangrams = 0
    n_word_percents_counted = 0
    current_head_word = None
@@ -60,71 +169,53 @@ if __name__ == "__main__":
    max_head_word = None
    max_head_word_count = 0
    word_count = dict()
-   for letter in ALPHABET_LIST:
-      print(letter, file=sys.stderr, flush=True, end=' ')
-      datadir = f"./data/{letter}/"
-      if os.path.isdir(datadir):
-         # Visit each file in the data dir
-         paths = sorted(glob(datadir+'*'))
-         for filepath in paths:
-            with open(filepath, 'r') as f:
-               # Read each line and split first into line_list array.
-               # Anagrams within the line are like: '[VIGOR|VIRGO]'
-               for line in f:
-                  line_list = line.split()
-                  if line_list[0] == '#':
-                     # For lines that start with '#', get the key word
-                     # which is either by itself, or the first word of
-                     # an anagram set like '[VIRGO|VIGOR]'
-                     word_or_anagram = line_list[1]
-                     if word_or_anagram[0] == '[':
-                        word = word_or_anagram[1:6]
-                     else:
-                        word = word_or_anagram
-                     if word[0] < DONE_FROM_LETTER:
-                        done_percent += word_percent[word]
-                        n_word_percents_counted += 1
-                  else:
-                     all_pgrams.append(line_list) # unexpanded anagrams here
-                     
-                     # Check if this is a new head word. If it is, note it,
-                     # check for a new max, and reset our counter for this head word.
-                     if line_list[0] != current_head_word:
-                        if count_this_head_word > max_head_word_count:
-                           max_head_word_count = count_this_head_word
-                           max_head_word = current_head_word
-                        current_head_word = line_list[0]
-                        count_this_head_word = 0
-                     
-                     # Visit each word or anagram set in the line, and
-                     # accumulate the words into our all_words WordList.
-                     # Also count how many pangrams are generated by expanding any anagrams.
-                     count_this_pangram = 1
-                     for item in line_list:
-                        # If it's five letters, this item is a single word
-                        if len(item) == 5:
-                           all_words.add_str(item)
-                           word_count[item] = word_count.get(item, 0) + 1
-                           if answers.contains(item):
-                              answers_used.add_str(item)
-                        else:
-                           # It's anagrams like '[VIGOR|VIRGO]', so trim and split it into words.
-                           stripped = item.strip('[]')
-                           words = stripped.split('|')
-                           word_count[words[0]] = word_count.get(words[0], 0) + 1
-                           count_this_pangram *= len(words)
-                           for w in words:
-                              all_words.add_str(w)
-                              if answers.contains(w):
-                                 answers_used.add_str(item)
-                     count_this_head_word += count_this_pangram
-                     total_pangrams += count_this_pangram
+   exact_counts = dict()
+   n_solution_pangrams = 0
+   answer_set = set(answers)
+   # The cached counts depend on the answers list too.
+   answers_key = hashlib.sha1(' '.join(sorted(answer_set)).encode()).hexdigest()
+   cache = ScanCache(CACHE_FILE, f'{COUNTS_VERSION} {DONE_FROM_LETTER} {answers_key}')
+   # Counts cached without -x are only good for a run without -x.
+   usable = lambda counts: counts['exact'] or not exact
+   letter = None
+   for (filepath, counts) in cached_scan(count_file, data_files(), cache, (answer_set, exact), processes, usable):
+      if file_letter(filepath) != letter:
+         letter = file_letter(filepath)
+         print(letter, file=sys.stderr, flush=True, end=' ')
+      for word in counts['percent_words']:
+         done_percent += word_percent[word]
+         n_word_percents_counted += 1
+      n_base_pangrams += counts['n_base']
+      total_pangrams += counts['n_expanded']
+      # A head word's run of pangrams can continue from one file into the next.
+      # When a new head word starts, check for a new max.
+      for (head_word, count) in counts['head_runs']:
+         if head_word != current_head_word:
+            if count_this_head_word > max_head_word_count:
+               max_head_word_count = count_this_head_word
+               max_head_word = current_head_word
+            current_head_word = head_word
+            count_this_head_word = 0
+         count_this_head_word += count
+      for (word, count) in counts['word_count'].items():
+         word_count[word] = word_count.get(word, 0) + count
+      for (word, (n, n_solution)) in counts['exact_counts'].items():
+         c = exact_counts.get(word)
+         if c is None:
+            exact_counts[word] = [n, n_solution]
+         else:
+            c[0] += n
+            c[1] += n_solution
+      n_solution_pangrams += counts['n_solution_pangrams']
+      all_words.update(counts['words_used'])
+      answers_used.update(counts['answers_used'])
    print('', file=sys.stderr, flush=True)
+   print(f"Counts of {cache.n_hits} unchanged data files were cached in {CACHE_FILE}", file=sys.stderr, flush=True)
    
-   print("N base pangrams:", len(all_pgrams), file=sys.stderr, flush=True)
+   print("N base pangrams:", n_base_pangrams, file=sys.stderr, flush=True)
    print("N expanded pangrams:", total_pangrams, file=sys.stderr, flush=True)
-   percent = len(all_words) / len(valid_guesses)
-   print(f"N words used: {len(all_words)} / {len(valid_guesses)} = {percent:.0%}", file=sys.stderr, flush=True)
+   percent = len(all_words) / len(lexicon)
+   print(f"N words used: {len(all_words)} / {len(lexicon)} = {percent:.0%}", file=sys.stderr, flush=True)
    percent = len(answers_used) / len(answers)
    print(f"N answers used: {len(answers_used)} / {len(answers)} = {percent:.0%}", file=sys.stderr, flush=True)
    print(f'Overall done = {done_percent:.2}% ({n_word_percents_counted} words before letter {DONE_FROM_LETTER})',
@@ -136,3 +227,13 @@ if __name__ == "__main__":
    l = sorted(word_count.items(), key=lambda t: t[1], reverse=True)[0:10]
    for t in l:
       print(f'{t[0]}: {t[1]}', file=sys.stderr, flush=True)
+
+   if exact:
+      percent = n_solution_pangrams / total_pangrams if total_pangrams > 0 else 0
+      print(f"N expanded pangrams containing solutions: {n_solution_pangrams} = {percent:.1%}", file=sys.stderr, flush=True)
+      print(f"Top {N_TOP_EXACT} words occurring in pangrams containing solutions:", file=sys.stderr, flush=True)
+      l = sorted(exact_counts.items(), key=lambda t: t[1][1], reverse=True)[0:N_TOP_EXACT]
+      for (word, (n, n_solution)) in l:
+         star = '*' if word in answer_set else ' '
+         percent = n_solution / n_solution_pangrams
+         print(f'1. `{word}`{star} : {percent:3.0%} ({n_solution:,})')
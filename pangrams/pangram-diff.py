@@ -0,0 +1,187 @@
+#!/usr/bin/python3
+# Copyright (C) 2025 Dez Moleski dez@moleski.com
+# MIT License: All uses allowed with attribution.
+#
+# Compare two sets of pangram search results, e.g. a new searcher's output
+# against the data files in ./data, and list the pangrams only in one of them.
+#
+# Each side is a file or a directory of files (searched recursively), in any
+# of the formats the searchers and scripts write: plain lines of six words as
+# pangram.c and pangram2.c print them, check-pangrams output, or data files
+# with anagram sets like [VIGOR|VIRGO]. Only the lines of six words are read;
+# counts lines, LAST: lines and the like are ignored.
+#
+# Every pangram is reduced to its key (see pangram_keys.py) with each word
+# replaced by the first word of its set of anagrams, so the same pangram is
+# the same key however a searcher chose to write the anagrams. The keys are
+# collected by worker processes into partitions on disk, then each partition
+# is sorted and the two sides compared, also in parallel, so the memory used
+# is bounded however many pangrams there are.
+#
+# The differences are printed grouped by the data file in ./data that covers
+# the pangram's head word (its first word), then by head word:
+#
+#   ./data/K/KAAMA-KLUTZ
+#      # KAGOS: 1 missing, 0 extra
+#      - KAGOS MULCT NAJIB [PREXY|PYREX] VOZHD WAQFS    old/K.txt:12
+#
+# where "-" pangrams are missing from the new results and "+" are extra.
+#
+import sys
+import os
+import os.path
+import tempfile
+from bisect import bisect_right
+from glob import glob
+from pangram_lexicon import Lexicon
+from pangram_keys import (MEMORY_BUDGET, N_PARTITIONS, DuplicateFinder, pangram_key,
+                          key_indices, file_position, split_position, partition_differences)
+from pangram_scan import scan, processes_arg, data_files, file_range
+
+USAGE = "Usage: pangram-diff [-j processes] [-m megabytes] old new"
+ALL_FILE = "./ALL"
+DATA_DIR = "./data"
+
+def side_files(path: str) -> list:
+   """ The file, or all the files in the directory and below, sorted """
+   if os.path.isdir(path):
+      return sorted([p for p in glob(os.path.join(path, '**', '*'), recursive=True) if os.path.isfile(p)])
+   return [path]
+
+def line_indices(line_list: list, word2index: dict, representatives: list):
+   """ The representative word index of each of the six items, or the first word not found.
+   An item may be a set of anagrams like [VIGOR|VIRGO].
+   """
+   indices = list()
+   for item in line_list:
+      w = item.strip('[]').split('|')[0]
+      i = word2index.get(w)
+      if i is None:
+         return w # PUNCH-OUT
+      indices.append(representatives[i])
+   return indices
+
+def keys_worker(filepath: str, context: tuple) -> dict:
+   """ Spill the keys of the pangrams in the file to the partitions, return counts of the lines read """
+   (word2index, representatives, file_numbers, shard_dir, n_partitions, memory_budget) = context
+   file_number = file_numbers[filepath]
+   finder = DuplicateFinder(memory_budget, n_partitions, shard_dir, f'.{file_number}')
+   result = {'pangrams': 0, 'not_found': 0, 'words_not_found': list()}
+   with open(filepath, 'r', errors='replace') as f:
+      for (line_number, line) in enumerate(f):
+         line_list = line.split()
+         if len(line_list) != 6:
+            continue
+         indices = line_indices(line_list, word2index, representatives)
+         if isinstance(indices, str):
+            result['not_found'] += 1
+            if len(result['words_not_found']) < 10:
+               result['words_not_found'].append(indices)
+            continue
+         finder.add(pangram_key(indices), file_position(file_number, line_number))
+         result['pangrams'] += 1
+   finder.spill()
+   return result
+
+def diff_worker(p: int, context: tuple) -> (list,list,dict):
+   (shard_dir, first_new_position) = context
+   return partition_differences(shard_dir, p, first_new_position)
+
+class DataFileRanges:
+   """ Which data file covers a head word, from the FIRST-LAST names of the data files """
+
+   def __init__(self, data_dir: str):
+      self.paths = data_files(data_dir) if os.path.isdir(data_dir) else list()
+      self.ranges = [file_range(filepath) for filepath in self.paths]
+      self.firsts = [first for (first, _) in self.ranges]
+
+   def data_file(self, head_word: str) -> str:
+      i = bisect_right(self.firsts, head_word) - 1
+      if i < 0 or head_word > self.ranges[i][1]:
+         return '(no data file)'
+      return self.paths[i]
+
+def format_pangram(indices: list, lexicon: Lexicon) -> str:
+   return ' '.join([lexicon.format_anagrams(lexicon.words[i-1])[0] for i in indices])
+
+if __name__ == "__main__":
+   (processes, args) = processes_arg(sys.argv, USAGE)
+   memory_budget = MEMORY_BUDGET
+   if len(args) >= 1 and args[0] == '-m':
+      if len(args) < 2 or not args[1].isdigit() or int(args[1]) < 1:
+         exit(USAGE)
+      memory_budget = int(args[1]) << 20
+      args = args[2:]
+   if len(args) != 2:
+      exit(USAGE)
+   if processes is None:
+      processes = os.cpu_count() or 1
+
+   sides = list()
+   for path in args:
+      if not os.path.exists(path):
+         exit(f'ERROR: {path} not found.')
+      sides.append(side_files(path))
+   (old_files, new_files) = sides
+   all_files = old_files + new_files
+   # The same file given on both sides still gets two file numbers.
+   old_file_numbers = {filepath: i for (i, filepath) in enumerate(old_files)}
+   new_file_numbers = {filepath: len(old_files) + i for (i, filepath) in enumerate(new_files)}
+
+   print("Loading lexicon of all valid guesses file:", ALL_FILE, file=sys.stderr, flush=True)
+   lexicon = Lexicon.open(ALL_FILE)
+   representatives = lexicon.records['representative'].tolist()
+
+   # Enough partitions that each one's keys (about 2/3 the size of their lines) fit in the budget.
+   total_size = sum([os.path.getsize(filepath) for filepath in all_files])
+   n_partitions = max(N_PARTITIONS, min(999, (total_size * 2 // 3) // memory_budget + 1))
+
+   side_counts = list()
+   with tempfile.TemporaryDirectory(prefix='pangram-diff-') as shard_dir:
+      for (name, files, numbers) in (('old', old_files, old_file_numbers), ('new', new_files, new_file_numbers)):
+         print(f'Reading {name} pangrams: {len(files)} files', file=sys.stderr, flush=True)
+         context = (lexicon.word2index, representatives, numbers, shard_dir, n_partitions, memory_budget // processes)
+         counts = {'files': len(files), 'pangrams': 0, 'not_found': 0, 'words_not_found': list()}
+         for (_, result) in scan(keys_worker, files, context, processes):
+            counts['pangrams'] += result['pangrams']
+            counts['not_found'] += result['not_found']
+            counts['words_not_found'].extend(result['words_not_found'])
+         side_counts.append(counts)
+
+      print("Comparing", n_partitions, "partitions of pangram keys", file=sys.stderr, flush=True)
+      missing = list()
+      extra = list()
+      totals = {'old': 0, 'new': 0, 'common': 0}
+      context = (shard_dir, file_position(len(old_files), 0))
+      for (_, (old_only, new_only, counts)) in scan(diff_worker, list(range(n_partitions)), context, processes):
+         missing.extend(old_only)
+         extra.extend(new_only)
+         for (k, v) in counts.items():
+            totals[k] += v
+
+   # Group the differences by data file and head word, in word order.
+   ranges = DataFileRanges(DATA_DIR)
+   groups = dict() # data file -> {head word -> list of (sign, indices, position)}
+   for (sign, rows) in (('-', missing), ('+', extra)):
+      for (hi, lo, position) in rows:
+         indices = key_indices(hi, lo)
+         head_word = lexicon.words[indices[0]-1]
+         groups.setdefault(ranges.data_file(head_word), dict()).setdefault(head_word, list()).append((sign, indices, position))
+   for data_file in sorted(groups.keys()):
+      print(data_file)
+      for head_word in sorted(groups[data_file].keys()):
+         diffs = sorted(groups[data_file][head_word], key=lambda d: (d[1], d[0]))
+         n_missing = sum([1 for d in diffs if d[0] == '-'])
+         print(f'   # {head_word}: {n_missing} missing, {len(diffs) - n_missing} extra')
+         for (sign, indices, position) in diffs:
+            (file_number, line_number) = split_position(position)
+            print(f'   {sign} {format_pangram(indices, lexicon)}    {all_files[file_number]}:{line_number+1}')
+
+   for (name, counts) in zip(('Old', 'New'), side_counts):
+      print(f'{name}: {counts["files"]:,} files, {counts["pangrams"]:,} pangram lines, '
+            f'{totals[name.lower()]:,} unique pangrams', file=sys.stderr)
+      if counts['not_found'] > 0:
+         print(f'   {counts["not_found"]:,} lines with words not in {ALL_FILE}, e.g.',
+               ' '.join(counts['words_not_found'][:10]), file=sys.stderr)
+   print(f'Common: {totals["common"]:,}  missing from new: {len(missing):,}  extra in new: {len(extra):,}',
+         file=sys.stderr, flush=True)
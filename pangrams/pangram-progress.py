@@ -0,0 +1,173 @@
+#!/usr/bin/python3
+# Copyright (C) 2025 Dez Moleski dez@moleski.com
+# MIT License: All uses allowed with attribution.
+#
+# Progress of the whole search, how fast it's going, and when it will finish.
+#
+# A head word is done once there's a "# WORD = n" line for it, either in a data
+# file under ./data or in the output of a searcher still running (by default
+# the coordinator's ./search/*.out files, or the files given). Each done word
+# counts for its share of the whole search from ./WORD-PERCENT, so there's no
+# need to say which letters are done, the way pangram-counts does.
+#
+# It's meant to be run every minute or so (e.g. with watch), so it only reads
+# what's new: the done words of each data file are cached in a ScanCache like
+# the counts of pangram-counts, and the searchers' output files are read on
+# from where the last run stopped. Each run adds a sample of the percent done
+# to the history in ./PANGRAM-PROGRESS.json, and the rates over the last hour,
+# the last day and the whole history are worked out from those samples. The
+# projected finish is from the rate over the last day.
+#
+import sys
+import os
+import os.path
+import json
+import time
+import datetime
+from glob import glob
+from pangram_scan import cached_scan, ScanCache, data_files, processes_arg, LETTERS
+
+USAGE = "Usage: pangram-progress [-j processes] [searcher output ...]"
+WORD_PERCENT_FILE = "./WORD-PERCENT"
+SEARCH_OUTPUT = "./search/*.out"
+CACHE_FILE = "./PANGRAM-PROGRESS.cache.json"
+STATE_FILE = "./PANGRAM-PROGRESS.json"
+DONE_VERSION = 1
+
+HISTORY_SECONDS = 7 * 24 * 3600 # samples older than this are dropped
+HOUR = 3600
+DAY = 24 * 3600
+
+def counts_line_word(line: str):
+   """ The head word of a "# WORD = n" or "# [ANAGRAMS] = n" line, or None for any other line """
+   line_list = line.split()
+   if len(line_list) == 4 and line_list[0] == '#' and line_list[2] == '=':
+      return line_list[1].strip('[]').split('|')[0]
+   return None
+
+def done_words(filepath: str, context) -> list:
+   """ The head words with counts lines in the data file """
+   words = list()
+   with open(filepath, 'r') as f:
+      for line in f:
+         if line.startswith('#'):
+            word = counts_line_word(line)
+            if word is not None:
+               words.append(word)
+   return words
+
+def tail_done_words(filepath: str, tail: dict) -> dict:
+   """ Read the searcher output file on from where the tail left off, adding to its done words.
+   The tail is {'inode', 'offset', 'words'}; the file is read from the start again if it was
+   replaced or cut short, as the coordinator does when it restarts a searcher.
+   """
+   st = os.stat(filepath)
+   if tail is None or tail['inode'] != st.st_ino or tail['offset'] > st.st_size:
+      tail = {'inode': st.st_ino, 'offset': 0, 'words': list()}
+   with open(filepath, 'rb') as f:
+      f.seek(tail['offset'])
+      text = f.read()
+   # Only up to the last complete line, the rest is still being written.
+   end = text.rfind(b'\n') + 1
+   for line in text[:end].decode(errors='replace').splitlines():
+      word = counts_line_word(line)
+      if word is not None:
+         tail['words'].append(word)
+   tail['offset'] += end
+   return tail
+
+def rate_since(history: list, seconds: float):
+   """ Percent per hour from the oldest sample within the last seconds to the latest, and the hours
+   between them, or None if there's only the one sample
+   """
+   (t_now, percent_now) = history[-1]
+   then = [(t, p) for (t, p) in history if t >= t_now - seconds][0]
+   hours = (t_now - then[0]) / HOUR
+   if hours <= 0:
+      return None # PUNCH-OUT
+   return ((percent_now - then[1]) / hours, hours)
+
+def format_hours(hours: float) -> str:
+   if hours < 1:
+      return f'{hours * 60:.0f} minutes'
+   if hours < 48:
+      return f'{hours:.1f} hours'
+   return f'{hours / 24:.1f} days'
+
+if __name__ == "__main__":
+   (processes, args) = processes_arg(sys.argv, USAGE)
+   search_paths = args if len(args) > 0 else sorted(glob(SEARCH_OUTPUT))
+
+   if not os.path.isfile(WORD_PERCENT_FILE):
+      exit(f'ERROR: {WORD_PERCENT_FILE} not found, make it with word-percent.')
+   word_percent = dict()
+   with open(WORD_PERCENT_FILE) as f:
+      for line in f:
+         wp = line.split()
+         if len(wp) == 2:
+            word_percent[wp[0]] = float(wp[1])
+   total_percent = sum(word_percent.values())
+
+   state = {'history': list(), 'tails': dict()}
+   if os.path.isfile(STATE_FILE):
+      with open(STATE_FILE) as f:
+         state = json.load(f)
+
+   # The done words of each data file, only rescanning the files that changed.
+   done = set()
+   paths = data_files()
+   cache = ScanCache(CACHE_FILE, str(DONE_VERSION))
+   for (_, words) in cached_scan(done_words, paths, cache, None, processes):
+      done.update(words)
+   n_data_done = len(done)
+
+   # And of each searcher still running, reading only what it's written since the last run.
+   tails = dict()
+   in_flight = list()
+   for filepath in search_paths:
+      if not os.path.isfile(filepath):
+         continue
+      tail = tail_done_words(filepath, state['tails'].get(filepath))
+      tails[filepath] = tail
+      new_words = [w for w in tail['words'] if w not in done]
+      done.update(new_words)
+      if len(new_words) > 0:
+         in_flight.append((filepath, len(new_words), new_words[-1]))
+   state['tails'] = tails
+
+   done_percent = 100.0 * sum([word_percent.get(w, 0.0) for w in sorted(done)]) / total_percent
+   now = time.time()
+   state['history'] = [(t, p) for (t, p) in state['history'] if t >= now - HISTORY_SECONDS]
+   state['history'].append((now, done_percent))
+   with open(STATE_FILE + '.tmp', 'w') as f:
+      json.dump(state, f)
+   os.replace(STATE_FILE + '.tmp', STATE_FILE)
+
+   print(f'Data files: {len(paths):,} ({cache.n_hits:,} unchanged), head words done: {n_data_done:,}')
+   for (filepath, n_words, last_word) in in_flight:
+      print(f'   {filepath}: {n_words:,} more done, last {last_word}')
+   print(f'Head words done: {len(done):,} / {len(word_percent):,}')
+   by_letter = list()
+   for letter in LETTERS:
+      letter_total = sum([p for (w, p) in word_percent.items() if w[0] == letter])
+      if letter_total > 0:
+         letter_done = sum([word_percent.get(w, 0.0) for w in done if w[0] == letter])
+         by_letter.append(f'{letter} {100.0 * letter_done / letter_total:.0f}%')
+   print('   ' + '  '.join(by_letter))
+   print(f'Overall done = {done_percent:.4f}%')
+
+   history = state['history']
+   for (name, seconds) in (('last hour', HOUR), ('last day', DAY), ('history', HISTORY_SECONDS)):
+      rate = rate_since(history, seconds)
+      if rate is not None:
+         print(f'Rate over the {name}: {rate[0]:.4f}% per hour ({rate[0] * 24:.3f}% per day, '
+               f'from {format_hours(rate[1])} of samples)')
+   rate = rate_since(history, DAY)
+   if rate is None:
+      print("Projected finish: run again later for a rate.")
+   elif rate[0] <= 0:
+      print("Projected finish: no progress over the last day.")
+   else:
+      hours_left = (100.0 - done_percent) / rate[0]
+      finish = datetime.datetime.fromtimestamp(now + hours_left * HOUR)
+      print(f'Projected finish: {finish:%Y-%m-%d %H:%M}, in {format_hours(hours_left)}')
@@ -0,0 +1,217 @@
+#!/usr/bin/python3
+# Copyright (C) 2025 Dez Moleski dez@moleski.com
+# MIT License: All uses allowed with attribution.
+#
+# Resident pangrams server: loads the word lists and the pangrams store, index
+# and stats once, then answers the play-pangram.py queries as JSON over HTTP on
+# localhost, for any number of concurrent sessions. Each session has its own
+# played words, and all of them share the one memory-mapped copy of the data.
+#
+# Every request is a GET, and every response is a JSON object. Start a session
+# with /new, then pass its id as session=ID to the session commands:
+#
+#   /new                                   {"session": ID}
+#   /status?session=ID
+#   /play?session=ID&words=WAQFS+VOZHD     plays the words in order, then /status
+#   /back?session=ID                       /clear?session=ID      /end?session=ID
+#   /think?session=ID&word=JUMPY
+#   /common?session=ID[&words=JUMPY+BLING]
+#   /solutions?session=ID[&pattern=.U...]
+#   /print?session=ID[&word=CLERK]
+#   /list[?n=50|all]                       /plan[?branches=2]
+#
+# For example: curl 'http://localhost:8026/play?session=ID&words=WAQFS+VOZHD'
+# Errors are returned with HTTP status 400 or 404 as {"error": "message"}.
+#
+import sys
+import json
+import secrets
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+from pangram_session import PangramData, PangramSession
+from pangram_lexicon import Lexicon
+
+ALL_FILE = "./ALL"
+ANSWERS_FILE = "./ANSWERS"
+ALL_PANGRAMS = "./SOLUTION-PANGRAMS"
+DEFAULT_PORT = 8026
+
+# Sessions not used for this long are dropped when a new session starts.
+SESSION_IDLE_SECONDS = 24 * 60 * 60
+
+class Sessions:
+   """ The open sessions by id, each with a lock so its requests are handled one at a time """
+
+   def __init__(self, data: PangramData):
+      self.data = data
+      self.lock = threading.Lock()
+      self.sessions = dict() # id -> [PangramSession, lock, last used time]
+
+   def new(self) -> str:
+      session_id = secrets.token_hex(8)
+      now = time.monotonic()
+      with self.lock:
+         for (old_id, entry) in list(self.sessions.items()):
+            if now - entry[2] > SESSION_IDLE_SECONDS:
+               del self.sessions[old_id]
+         self.sessions[session_id] = [PangramSession(self.data), threading.Lock(), now]
+      return session_id
+
+   def get(self, session_id: str):
+      """ The [session, lock, last used] entry for the given id, or None """
+      with self.lock:
+         entry = self.sessions.get(session_id)
+         if entry is not None:
+            entry[2] = time.monotonic()
+         return entry
+
+   def end(self, session_id: str) -> bool:
+      with self.lock:
+         return self.sessions.pop(session_id, None) is not None
+
+def words_param(params: dict, name: str) -> list:
+   """ The upper-cased words of a query parameter, which may be given more than once """
+   return [w.upper() for value in params.get(name, list()) for w in value.replace(',', ' ').split()]
+
+def one_param(params: dict, name: str):
+   values = params.get(name)
+   return values[0] if values else None
+
+def int_param(params: dict, name: str, default: int) -> int:
+   value = one_param(params, name)
+   if value is None:
+      return default
+   try:
+      return int(value)
+   except ValueError:
+      raise ValueError(f'{name}={value} is not a number.')
+
+def do_play(session: PangramSession, params: dict) -> dict:
+   errors = list()
+   for word_str in words_param(params, 'words'):
+      try:
+         session.play(word_str)
+      except ValueError as e:
+         errors.append(str(e))
+   result = session.status()
+   if len(errors) > 0:
+      result['errors'] = errors
+   return result
+
+def do_back(session: PangramSession, params: dict) -> dict:
+   if not session.back():
+      raise ValueError("Can't back up, no words played.")
+   return session.status()
+
+def do_clear(session: PangramSession, params: dict) -> dict:
+   session.clear()
+   return session.status()
+
+def do_think(session: PangramSession, params: dict) -> dict:
+   word_str = one_param(params, 'word')
+   if word_str is None:
+      raise ValueError('think needs a word=WORD parameter.')
+   return session.think(word_str.upper())
+
+def do_common(session: PangramSession, params: dict) -> dict:
+   return session.common(words_param(params, 'words'))
+
+def do_solutions(session: PangramSession, params: dict) -> dict:
+   solutions = session.solutions(one_param(params, 'pattern'))
+   return {'count': len(solutions), 'solutions': [w for (w, _) in solutions],
+           'pangrams': {w: n for (w, n) in solutions}}
+
+def do_print(session: PangramSession, params: dict) -> dict:
+   word_str = one_param(params, 'word')
+   return {'pangrams': session.pangram_lines(None if word_str is None else word_str.upper())}
+
+# Commands that run in a session, given the session and the query parameters.
+SESSION_COMMANDS = {
+   'status': lambda session, params: session.status(),
+   'play': do_play,
+   'back': do_back,
+   'clear': do_clear,
+   'think': do_think,
+   'common': do_common,
+   'solutions': do_solutions,
+   'print': do_print,
+}
+
+class PangramRequestHandler(BaseHTTPRequestHandler):
+   # Set on the class before serving.
+   data: PangramData = None
+   sessions: Sessions = None
+
+   def send_json(self, status: int, result: dict):
+      body = json.dumps(result).encode()
+      self.send_response(status)
+      self.send_header('Content-Type', 'application/json')
+      self.send_header('Content-Length', str(len(body)))
+      self.end_headers()
+      self.wfile.write(body)
+
+   def do_GET(self):
+      url = urlsplit(self.path)
+      command = url.path.strip('/')
+      params = parse_qs(url.query)
+      try:
+         if command == 'new':
+            self.send_json(200, {'session': self.sessions.new()})
+         elif command == 'list':
+            n = one_param(params, 'n')
+            n_top = len(self.data.stats['words']) if n == 'all' else int_param(params, 'n', 50)
+            self.send_json(200, {'words': self.data.word_list(n_top)})
+         elif command == 'plan':
+            self.send_json(200, self.data.plan(int_param(params, 'branches', 2)))
+         elif command == 'end':
+            if self.sessions.end(one_param(params, 'session')):
+               self.send_json(200, {})
+            else:
+               self.send_json(404, {'error': 'No such session.'})
+         elif command in SESSION_COMMANDS:
+            entry = self.sessions.get(one_param(params, 'session'))
+            if entry is None:
+               self.send_json(404, {'error': 'No such session, start one with /new.'})
+               return # PUNCH-OUT
+            (session, lock, _) = entry
+            with lock:
+               result = SESSION_COMMANDS[command](session, params)
+            self.send_json(200, result)
+         else:
+            self.send_json(404, {'error': f'Unknown command: {command}'})
+      except ValueError as e:
+         self.send_json(400, {'error': str(e)})
+
+if __name__ == "__main__":
+   if len(sys.argv) > 2:
+      exit("Usage: pangram-server [port]")
+   port = DEFAULT_PORT
+   if len(sys.argv) == 2:
+      try:
+         port = int(sys.argv[1])
+      except ValueError:
+         exit(f'ERROR: {sys.argv[1]} is not a port number.')
+
+   print("Loading lexicon of all valid guesses file:", ALL_FILE, file=sys.stderr, flush=True, end=' ')
+   lexicon = Lexicon.open(ALL_FILE, ANSWERS_FILE)
+   answers = lexicon.answers()
+   print("N =", len(lexicon), "solutions =", len(answers), file=sys.stderr, flush=True)
+
+   data = PangramData()
+   data.set_words(lexicon.words, answers)
+   print("Opening pangrams store and index:", ALL_PANGRAMS, file=sys.stderr, flush=True)
+   data.open_pangrams(ALL_PANGRAMS)
+   print("Pangrams ready: N =", len(data.store), file=sys.stderr, flush=True)
+
+   PangramRequestHandler.data = data
+   PangramRequestHandler.sessions = Sessions(data)
+   # Only listen on localhost; there is no authentication beyond the session ids.
+   server = ThreadingHTTPServer(('127.0.0.1', port), PangramRequestHandler)
+   server.daemon_threads = True
+   print(f'Serving pangrams on http://127.0.0.1:{port}/', file=sys.stderr, flush=True)
+   try:
+      server.serve_forever()
+   except KeyboardInterrupt:
+      print('Byeee!', file=sys.stderr)
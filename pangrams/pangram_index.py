@@ -0,0 +1,145 @@
+#!/usr/bin/python3
+# Copyright (C) 2025 Dez Moleski dez@moleski.com
+# MIT License: All uses allowed with attribution.
+#
+# Inverted index over the solution pangrams.
+#
+# For each word we keep the sorted list (the "posting list") of ids of the
+# pangrams containing that word. A pangram id is the record number of the
+# pangram in the binary store (see pangram_store.py), which is also its line
+# number in SOLUTION-PANGRAMS, counting from zero. Words are numbered the same
+# way genc_all_words.py numbers them: the first word of the sorted ALL list has
+# index one, so that word index zero can be used as the "null" word.
+#
+# The index is two .npy files next to the pangrams file, memory-mapped on open:
+#   SOLUTION-PANGRAMS.postings.npy  uint32 pangram ids, grouped by word index
+#   SOLUTION-PANGRAMS.offsets.npy   int64, word w's postings are [offsets[w]:offsets[w+1]]
+#
+import sys
+import os
+import os.path
+import numpy as np
+from pangram_store import PangramStore, store_path, word_indices
+
+# Pangrams handled per chunk when sorting the word occurrences into posting lists.
+CHUNK_SIZE = 1 << 20
+
+def index_paths(pangrams_file: str):
+   return (pangrams_file + '.postings.npy',
+           pangrams_file + '.offsets.npy')
+
+def index_is_current(pangrams_file: str) -> bool:
+   """ True if all the index files exist and are newer than the pangrams store """
+   store_mtime = os.path.getmtime(store_path(pangrams_file))
+   for path in index_paths(pangrams_file):
+      if not os.path.isfile(path) or os.path.getmtime(path) < store_mtime:
+         return False
+   return True
+
+def intersect(a, b):
+   """ Intersect two sorted arrays of pangram ids """
+   if len(a) > len(b):
+      a, b = b, a
+   if len(a) == 0:
+      return np.zeros(0, dtype=np.uint32)
+   # Look up each element of the shorter list in the longer one.
+   i = np.searchsorted(b, a)
+   i[i == len(b)] = 0
+   return a[b[i] == a]
+
+def subtract(ids, subset, n_pangrams: int):
+   """ The sorted pangram ids not in the given sorted subset of ids, where ids None means all pangrams """
+   if ids is None:
+      keep = np.ones(n_pangrams, dtype=bool)
+      keep[subset] = False
+      return np.flatnonzero(keep).astype(np.uint32)
+   keep = np.ones(len(ids), dtype=bool)
+   keep[np.searchsorted(ids, subset)] = False
+   return ids[keep]
+
+def save_npy(path: str, a):
+   # Write next to the final path and rename, so a half-written index is never used.
+   with open(path + '.tmp', 'wb') as f:
+      np.save(f, a)
+   os.replace(path + '.tmp', path)
+
+def build_index(store: PangramStore):
+   """ Sort the word occurrences of the pangrams store into the index files """
+   postings_path, offsets_path = index_paths(store.pangrams_file)
+   n_words = len(store.words)
+   words_by_pangram = store.word_matrix()
+   n_pangrams = len(words_by_pangram)
+   print(f'Indexing {n_pangrams} pangrams', end='', flush=True, file=sys.stderr)
+
+   # Pass 1: count the pangrams containing each word to lay out the posting lists.
+   counts = np.zeros(n_words+1, dtype=np.int64)
+   for start in range(0, n_pangrams, CHUNK_SIZE):
+      counts += np.bincount(words_by_pangram[start:start+CHUNK_SIZE].ravel(), minlength=n_words+1)
+   offsets = np.zeros(n_words+2, dtype=np.int64)
+   np.cumsum(counts, out=offsets[1:])
+
+   # Pass 2: counting sort of the word occurrences into the postings file.
+   # A stable sort keeps the pangram ids ascending within each posting list.
+   postings = np.lib.format.open_memmap(postings_path + '.tmp', mode='w+',
+                                        dtype=np.uint32, shape=(int(offsets[-1]),))
+   cursor = offsets[:-1].copy()
+   for start in range(0, n_pangrams, CHUNK_SIZE):
+      flat = words_by_pangram[start:start+CHUNK_SIZE].ravel()
+      order = np.argsort(flat, kind='stable')
+      sorted_words = flat[order]
+      chunk_counts = np.bincount(sorted_words, minlength=n_words+1)
+      chunk_starts = np.cumsum(chunk_counts) - chunk_counts
+      rank = np.arange(len(sorted_words)) - chunk_starts[sorted_words]
+      postings[cursor[sorted_words] + rank] = order // 6 + start
+      cursor += chunk_counts
+      print('.', end='', flush=True, file=sys.stderr)
+   print('', file=sys.stderr, flush=True)
+   postings.flush()
+   del postings
+   os.replace(postings_path + '.tmp', postings_path)
+   save_npy(offsets_path, offsets)
+
+class PangramIndex:
+   """ Memory-mapped inverted index: word -> sorted ids of the pangrams containing that word """
+
+   def __init__(self, store: PangramStore):
+      self.store = store
+      self.word2index = word_indices(store.words)
+      postings_path, offsets_path = index_paths(store.pangrams_file)
+      self.all_postings = np.load(postings_path, mmap_mode='r')
+      self.offsets = np.load(offsets_path)
+
+   @classmethod
+   def open(cls, store: PangramStore):
+      """ Open the index for the given pangrams store, (re)building it first if needed """
+      if not index_is_current(store.pangrams_file):
+         build_index(store)
+      return cls(store)
+
+   def __len__(self):
+      return len(self.store)
+
+   def postings(self, word_str: str):
+      """ Sorted ids of all pangrams containing the given word """
+      index = self.word2index.get(word_str, 0)
+      return self.all_postings[self.offsets[index]:self.offsets[index+1]]
+
+   def select(self, ids, word_str: str):
+      """ The given sorted pangram ids, narrowed to the pangrams containing the given word """
+      return intersect(ids, self.postings(word_str))
+
+   def count(self, ids, word_str: str) -> int:
+      """ How many of the given pangram ids are pangrams containing the given word """
+      return len(self.select(ids, word_str))
+
+if __name__ == "__main__":
+   if len(sys.argv) != 1:
+      exit("Usage: pangram_index")
+
+   from pangram_lexicon import Lexicon
+   ALL_FILE = "./ALL"
+   ALL_PANGRAMS = "./SOLUTION-PANGRAMS"
+   print("Loading lexicon of all valid guesses file:", ALL_FILE, file=sys.stderr, flush=True, end=' ')
+   lexicon = Lexicon.open(ALL_FILE)
+   print("N =", len(lexicon), file=sys.stderr, flush=True)
+   build_index(PangramStore.open(ALL_PANGRAMS, lexicon.words))
@@ -0,0 +1,174 @@
+#!/usr/bin/python3
+# Copyright (C) 2025 Dez Moleski dez@moleski.com
+# MIT License: All uses allowed with attribution.
+#
+# Compact pangram keys, and finding duplicate pangrams in bounded memory.
+#
+# A pangram's key is its six word indices (as numbered in the lexicon, see
+# pangram_lexicon.py) in ascending order, packed 16 bits each into two uint64s:
+#
+#   hi = w0 << 48 | w1 << 32 | w2 << 16 | w3        lo = w4 << 16 | w5
+#
+# so sorting keys by (hi, lo) sorts pangrams like their canonical sorted-words
+# strings, and two lines are the same pangram exactly when their keys match.
+#
+# DuplicateFinder collects (hi, lo, position) triples, 24 bytes each, and
+# reports the positions whose key already appeared at an earlier position. A
+# position is a line number, or file_position(file number, line number) when
+# checking several files together. Up to a memory budget the triples are kept
+# in memory and sorted; beyond it they are spilled to files hash-partitioned
+# by key, so that every copy of a key lands in the same partition, and each
+# partition is sorted on its own.
+#
+# Several processes can spill into the same directory, each with its own file
+# suffix; partition_duplicates() then finds the duplicates in one partition
+# across all of them, so the partitions can be checked in parallel too. In the
+# same way partition_differences() compares two sets of pangrams, the "old"
+# ones at positions before a given position and the "new" ones after it.
+#
+import os
+import os.path
+import tempfile
+from glob import glob
+from array import array
+import numpy as np
+
+ALL_LETTERS = (1 << 26) - 1
+
+# Default memory for keys before spilling to disk.
+MEMORY_BUDGET = 1 << 30
+
+# Number of partitions of the keys once spilled to disk.
+N_PARTITIONS = 64
+
+def pangram_key(indices: list) -> (int,int):
+   """ The (hi, lo) key of the pangram with the given six word indices, in any order """
+   w = sorted(indices)
+   return ((w[0] << 48) | (w[1] << 32) | (w[2] << 16) | w[3], (w[4] << 16) | w[5])
+
+def key_indices(hi: int, lo: int) -> list:
+   """ The six ascending word indices of a key """
+   return [(hi >> 48) & 0xFFFF, (hi >> 32) & 0xFFFF, (hi >> 16) & 0xFFFF, hi & 0xFFFF,
+           (lo >> 16) & 0xFFFF, lo & 0xFFFF]
+
+def key_partitions(hi, lo, n_partitions: int):
+   """ Partition number of each of the keys in the (hi, lo) uint64 arrays """
+   h = (hi * np.uint64(0x9E3779B97F4A7C15)) ^ (lo * np.uint64(0xC2B2AE3D27D4EB4F))
+   return ((h >> np.uint64(40)) % np.uint64(n_partitions)).astype(np.intp)
+
+def file_position(file_number: int, line_number: int) -> int:
+   return (file_number << 40) | line_number
+
+def split_position(position: int) -> (int,int):
+   """ The (file number, line number) of a position """
+   return (position >> 40, position & ((1 << 40) - 1))
+
+def duplicate_positions(triples):
+   """ Positions of the (hi, lo, position) rows whose key is at an earlier position too,
+   and the position of that key's first row for each of them
+   """
+   if len(triples) == 0:
+      return (np.zeros(0, dtype=np.uint64), np.zeros(0, dtype=np.uint64))
+   order = np.lexsort((triples[:, 2], triples[:, 1], triples[:, 0]))
+   t = triples[order]
+   same = np.zeros(len(t), dtype=bool)
+   same[1:] = (t[1:, 0] == t[:-1, 0]) & (t[1:, 1] == t[:-1, 1])
+   # Index of the first row of each run of the same key
+   first = np.maximum.accumulate(np.where(same, 0, np.arange(len(t))))
+   return (t[same, 2], t[first[same], 2])
+
+def key_differences(triples, first_new_position: int) -> (list,list,dict):
+   """ Compare the keys of the (hi, lo, position) rows at positions before first_new_position (old)
+   with the rest (new). Returns the rows of the first copy of each key only in the old ones, those
+   only in the new ones, and the counts of unique and common keys.
+   """
+   counts = {'old': 0, 'new': 0, 'common': 0}
+   if len(triples) == 0:
+      return (list(), list(), counts)
+   order = np.lexsort((triples[:, 2], triples[:, 1], triples[:, 0]))
+   t = triples[order]
+   is_new = t[:, 2] >= np.uint64(first_new_position)
+   run_start = np.ones(len(t), dtype=bool)
+   run_start[1:] = (t[1:, 0] != t[:-1, 0]) | (t[1:, 1] != t[:-1, 1])
+   starts = np.flatnonzero(run_start)
+   in_old = np.logical_or.reduceat(~is_new, starts)
+   in_new = np.logical_or.reduceat(is_new, starts)
+   counts['old'] = int(in_old.sum())
+   counts['new'] = int(in_new.sum())
+   counts['common'] = int((in_old & in_new).sum())
+   # Rows are by position within each run, so the first row of a run is its first copy.
+   return (t[starts[in_old & ~in_new]].tolist(), t[starts[in_new & ~in_old]].tolist(), counts)
+
+def partition_path(directory: str, p: int, suffix: str = '') -> str:
+   return os.path.join(directory, f'keys-{p:03d}{suffix}')
+
+def partition_duplicates(directory: str, p: int) -> (list,list):
+   """ The duplicate_positions() of partition p, over all the files spilled to it in the directory """
+   paths = glob(partition_path(directory, p) + '*')
+   if len(paths) == 0:
+      return (list(), list())
+   triples = np.concatenate([np.fromfile(path, dtype=np.uint64) for path in paths]).reshape(-1, 3)
+   (positions, firsts) = duplicate_positions(triples)
+   return (positions.tolist(), firsts.tolist())
+
+def partition_differences(directory: str, p: int, first_new_position: int) -> (list,list,dict):
+   """ The key_differences() of partition p, over all the files spilled to it in the directory """
+   paths = glob(partition_path(directory, p) + '*')
+   if len(paths) == 0:
+      return key_differences(np.zeros((0, 3), dtype=np.uint64), first_new_position)
+   triples = np.concatenate([np.fromfile(path, dtype=np.uint64) for path in paths]).reshape(-1, 3)
+   return key_differences(triples, first_new_position)
+
+class DuplicateFinder:
+   """ Collects pangram keys by position, then finds the positions repeating an earlier position's pangram.
+   Keys are spilled to the given directory (with the suffix on the file names) once over the memory
+   budget, or to a temporary directory of its own if none is given.
+   """
+
+   def __init__(self, memory_budget: int = MEMORY_BUDGET, n_partitions: int = N_PARTITIONS,
+                directory: str = None, suffix: str = ''):
+      self.max_buffered = max(1, memory_budget // 24)
+      self.n_partitions = n_partitions
+      self.directory = directory
+      self.suffix = suffix
+      self.buffer = array('Q')
+      self.n_keys = 0
+      self.tmpdir = None # our own spill directory, if we made one
+      self.spilled = False
+
+   def add(self, key: tuple, position: int):
+      self.buffer.extend((key[0], key[1], position))
+      self.n_keys += 1
+      if len(self.buffer) >= 3 * self.max_buffered:
+         self.spill()
+
+   def spill(self):
+      """ Append the buffered keys to their partition files """
+      if self.directory is None:
+         self.tmpdir = tempfile.TemporaryDirectory(prefix='pangram-keys-')
+         self.directory = self.tmpdir.name
+      triples = np.frombuffer(self.buffer, dtype=np.uint64).reshape(-1, 3)
+      partitions = key_partitions(triples[:, 0], triples[:, 1], self.n_partitions)
+      order = np.argsort(partitions, kind='stable')
+      bounds = np.searchsorted(partitions[order], np.arange(self.n_partitions+1))
+      for p in range(self.n_partitions):
+         if bounds[p] < bounds[p+1]:
+            with open(partition_path(self.directory, p, self.suffix), 'ab') as f:
+               triples[order[bounds[p]:bounds[p+1]]].tofile(f)
+      self.buffer = array('Q')
+      self.spilled = True
+
+   def duplicates(self) -> set:
+      """ The set of positions whose pangram key is the same as an earlier position's """
+      if not self.spilled:
+         triples = np.frombuffer(self.buffer, dtype=np.uint64).reshape(-1, 3)
+         return set(duplicate_positions(triples)[0].tolist())
+      self.spill()
+      positions = set()
+      for p in range(self.n_partitions):
+         positions.update(partition_duplicates(self.directory, p)[0])
+      if self.tmpdir is not None:
+         self.tmpdir.cleanup()
+         self.tmpdir = None
+         self.directory = None
+      return positions
@@ -0,0 +1,152 @@
+#!/usr/bin/python3
+# Copyright (C) 2025 Dez Moleski dez@moleski.com
+# MIT License: All uses allowed with attribution.
+#
+# Compiled binary lexicon of the word list and answers.
+#
+# Everything the scripts derive from ALL and ANSWERS at startup is compiled
+# once into ALL.lexicon.npy next to the word list: one fixed-width record per
+# word, numbered the way genc_all_words.py numbers them (record i is word index
+# i, and record zero is the "null" word), with these fields:
+#
+#   word            the five letters
+#   mask            26-bit letter set mask, A is bit 0 (like CHARMASK_A in wordle.h)
+#   n_letters       number of distinct letters
+#   anagram_class   1-based number of the word's set of anagrams, in the order of
+#                   the ANAGRAMS table in all_words.inl, or 0 if it has no anagrams
+#   representative  word index of the first word of the word's set of anagrams
+#                   (the one kept in the NO-ANAGRAMS list), or of the word itself
+#   answer          1 if the word is a known potential solution (in ANSWERS)
+#
+# As everywhere else here, anagrams are words with the same SET of letters.
+# The lexicon is recompiled automatically when ALL or ANSWERS is newer.
+#
+import sys
+import os
+import os.path
+import numpy as np
+
+LEXICON_RECORD = np.dtype([('word', 'S5'), ('mask', '<u4'), ('n_letters', 'u1'),
+                           ('anagram_class', '<u2'), ('representative', '<u2'), ('answer', 'u1')])
+
+def lexicon_path(words_file: str) -> str:
+   return words_file + '.lexicon.npy'
+
+def lexicon_is_current(words_file: str, answers_file: str) -> bool:
+   """ True if the lexicon exists and is newer than the word list and answers files """
+   path = lexicon_path(words_file)
+   if not os.path.isfile(path):
+      return False
+   mtime = os.path.getmtime(path)
+   if os.path.getmtime(words_file) > mtime:
+      return False
+   return not os.path.isfile(answers_file) or os.path.getmtime(answers_file) <= mtime
+
+def sorted_letters(word_str: str) -> str:
+   return ''.join(sorted(set(word_str)))
+
+def compile_lexicon(words_file: str, answers_file: str):
+   """ Read the word list and answers (if the file exists) and write the lexicon """
+   from wordgames import WordList
+   all_words = WordList.from_file(words_file)
+   all_words.sort()
+   words = [w.word for w in all_words.word_list]
+   answer_set = set()
+   if os.path.isfile(answers_file):
+      answer_set = set([w.word for w in WordList.from_file(answers_file).word_list])
+
+   # Group the words by letter set, keeping only the sets with more than one word.
+   # Words are sorted, so each set's list is too, and its first word is the representative.
+   by_letters = dict()
+   for (i, w) in enumerate(words):
+      by_letters.setdefault(sorted_letters(w), list()).append(i+1)
+   classes = [by_letters[k] for k in sorted(by_letters.keys()) if len(by_letters[k]) > 1]
+
+   records = np.zeros(len(words)+1, dtype=LEXICON_RECORD)
+   for (i, w) in enumerate(words):
+      r = records[i+1]
+      r['word'] = w.encode()
+      r['mask'] = sum([1 << (ord(c) - ord('A')) for c in set(w)])
+      r['n_letters'] = len(set(w))
+      r['representative'] = i+1
+      r['answer'] = w in answer_set
+   for (class_number, indices) in enumerate(classes):
+      records['anagram_class'][indices] = class_number + 1
+      records['representative'][indices] = indices[0]
+
+   path = lexicon_path(words_file)
+   # Write next to the final path and rename, so a half-written lexicon is never used.
+   with open(path + '.tmp', 'wb') as f:
+      np.save(f, records)
+   os.replace(path + '.tmp', path)
+
+class Lexicon:
+   """ The compiled word list: word strings and the per-word lexicon records """
+
+   def __init__(self, words_file: str):
+      self.records = np.load(lexicon_path(words_file))
+      self.words = [w.decode() for w in self.records['word'][1:]] # word index i is words[i-1]
+      self.word2index = {w: i+1 for (i, w) in enumerate(self.words)}
+      # Word indices of each set of anagrams, by anagram class
+      classes = self.records['anagram_class']
+      order = np.argsort(classes, kind='stable')
+      starts = np.searchsorted(classes[order], np.arange(classes.max()+2))
+      self.classes = [order[starts[c]:starts[c+1]].tolist() for c in range(classes.max()+1)]
+
+   @classmethod
+   def open(cls, words_file: str = './ALL', answers_file: str = './ANSWERS'):
+      """ Load the lexicon of the given word list, compiling it first if needed """
+      if not lexicon_is_current(words_file, answers_file):
+         compile_lexicon(words_file, answers_file)
+      return cls(words_file)
+
+   def __len__(self):
+      return len(self.words)
+
+   def contains(self, word_str: str) -> bool:
+      return word_str in self.word2index
+
+   def is_answer(self, word_str: str) -> bool:
+      index = self.word2index.get(word_str)
+      return index is not None and self.records['answer'][index] == 1
+
+   def answers(self) -> list:
+      """ The sorted known potential solutions in the word list """
+      return [self.words[i-1] for i in np.flatnonzero(self.records['answer'])]
+
+   def anagrams(self, word_str: str) -> list:
+      """ The word's sorted set of anagrams, including the word, or None if it has none (or isn't a word) """
+      c = self.records['anagram_class'][self.word2index.get(word_str, 0)]
+      if c == 0:
+         return None
+      return [self.words[i-1] for i in self.classes[c]]
+
+   def format_anagrams(self, word_str: str) -> (str,int):
+      """ The word formatted with its anagrams like '[VIGOR|VIRGO]' (the word first), and how many words that is """
+      word_anagrams = self.anagrams(word_str)
+      if word_anagrams is None:
+         return (word_str, 1)
+      others = [w for w in word_anagrams if w != word_str]
+      return ('[' + '|'.join([word_str] + others) + ']', len(word_anagrams))
+
+   def anagram_sets(self) -> list:
+      """ Every set of anagrams as a sorted list of words, in anagram class order """
+      return [[self.words[i-1] for i in indices] for indices in self.classes[1:]]
+
+   def no_anagrams(self) -> list:
+      """ The sorted words that are the representative of their set of anagrams, or have no anagrams """
+      indices = np.flatnonzero(self.records['representative'] == np.arange(len(self.records)))
+      return [self.words[i-1] for i in indices if i > 0]
+
+if __name__ == "__main__":
+   if len(sys.argv) != 1:
+      exit("Usage: pangram_lexicon")
+
+   ALL_FILE = "./ALL"
+   ANSWERS_FILE = "./ANSWERS"
+   print("Compiling lexicon:", lexicon_path(ALL_FILE), file=sys.stderr, flush=True, end=' ')
+   compile_lexicon(ALL_FILE, ANSWERS_FILE)
+   lexicon = Lexicon(ALL_FILE)
+   print("N =", len(lexicon), "anagram sets =", len(lexicon.classes)-1,
+         "no-anagrams =", len(lexicon.no_anagrams()), "answers =", len(lexicon.answers()),
+         file=sys.stderr, flush=True)
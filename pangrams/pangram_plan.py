@@ -0,0 +1,175 @@
+#!/usr/bin/python3
+# Copyright (C) 2025 Dez Moleski dez@moleski.com
+# MIT License: All uses allowed with attribution.
+#
+# Planner for winning Wordle with a pangram, like @WT's decision tree in the
+# README: play three words in any order, then decide on a fourth word, then
+# decide on a fifth word, and finally solve. The plan wins on the days the
+# solution supplies every letter the five played words are missing, so the
+# win probability of a plan is the share of solutions containing all of the
+# missing letters of at least one of its leaves (the branch decisions count as
+# made correctly, just as the README odds do).
+#
+# Everything is done with 26-bit letter masks (A is bit 0, like CHARMASK_A in
+# wordle.h) rather than strings: a table of the letter mask of every word, and
+# an answer-coverage table holding, for every letter, the set of solutions
+# containing that letter as a bitset (a Python int, bit i for the i'th answer).
+#
+# The best leaves miss exactly one letter, and five words missing one letter
+# are a 25-letter heterogram. So the openings searched are the three-word
+# subsets of every heterogram; for each opening the two decision steps are
+# chosen greedily from all words, allowing leaves that miss up to two letters.
+#
+from itertools import combinations
+import numpy as np
+
+ALL_LETTERS = (1 << 26) - 1
+
+def letter_mask(word_str: str) -> int:
+   mask = 0
+   for c in word_str:
+      mask |= 1 << (ord(c) - ord('A'))
+   return mask
+
+def mask_letters(mask: int) -> str:
+   return ''.join([chr(ord('A') + l) for l in range(26) if mask & (1 << l)])
+
+def popcount(a):
+   """ Number of bits set in each element of a uint32 array """
+   a = a - ((a >> 1) & 0x55555555)
+   a = (a & 0x33333333) + ((a >> 2) & 0x33333333)
+   a = (a + (a >> 4)) & 0x0F0F0F0F
+   return (a * np.uint32(0x01010101)) >> 24
+
+class PangramPlanner:
+   """ Letter-mask and answer-coverage tables, and the search for the best pangram-win plan """
+
+   def __init__(self, words: list, answers: list):
+      self.words = words # sorted word strings
+      self.word_masks = np.array([letter_mask(w) for w in words], dtype=np.uint32)
+      self.answers = answers
+      self.all_answers = (1 << len(answers)) - 1
+      self.letter_answers = [0] * 26
+      for (i, a) in enumerate(answers):
+         for l in range(26):
+            if letter_mask(a) & (1 << l):
+               self.letter_answers[l] |= 1 << i
+      self.covers = dict() # missing letters mask -> bitset of answers containing all of them
+      self.heterogram_list = None
+
+   def covered(self, missing: int) -> int:
+      """ Bitset of the answers containing all the given missing letters """
+      bits = self.covers.get(missing)
+      if bits is None:
+         bits = self.all_answers
+         for l in range(26):
+            if missing & (1 << l):
+               bits &= self.letter_answers[l]
+         self.covers[missing] = bits
+      return bits
+
+   def mask_words(self, mask: int) -> str:
+      """ The words with exactly the given letters, formatted like '[VIGOR|VIRGO]' if there are several """
+      l = [self.words[i] for i in np.flatnonzero(self.word_masks == mask)]
+      return l[0] if len(l) == 1 else '[' + '|'.join(l) + ']'
+
+   def heterograms(self) -> list:
+      """ Every set of five words with 25 distinct letters, as sorted tuples of letter masks """
+      if self.heterogram_list is not None:
+         return self.heterogram_list
+      masks = np.unique(self.word_masks[popcount(self.word_masks) == 5])
+      # Visit the letters rarest first, and put each mask in the bucket of its rarest letter.
+      # When the rarest uncovered letter is l, any word that can cover it is in l's bucket.
+      order = sorted(range(26), key=lambda l: np.count_nonzero(masks & (1 << l)))
+      buckets = list()
+      unbucketed = masks
+      for l in order:
+         has_l = (unbucketed & (1 << l)) != 0
+         buckets.append(unbucketed[has_l])
+         unbucketed = unbucketed[~has_l]
+      found = list()
+
+      def search(covered: int, chosen: list, skipped: bool, pos: int):
+         if len(chosen) == 5:
+            found.append(tuple(sorted(chosen)))
+            return
+         while pos < 26 and covered & (1 << order[pos]):
+            pos += 1
+         if pos == 26:
+            return
+         bucket = buckets[pos]
+         for m in bucket[(bucket & covered) == 0]:
+            search(covered | int(m), chosen + [int(m)], skipped, pos+1)
+         if not skipped:
+            # Let this one letter be the one the heterogram is missing.
+            search(covered | (1 << order[pos]), chosen, True, pos+1)
+
+      search(0, list(), False, 0)
+      self.heterogram_list = found
+      return found
+
+   def best_tree(self, opening: int, branches: int):
+      """ Greedily choose up to 'branches' fourth words, each with up to 'branches' fifth words.
+      Returns (bitset of answers covered, [(word4 mask, [(word5 mask, missing letters mask), ...]), ...])
+      """
+      remaining = ALL_LETTERS & ~opening
+      useful = self.word_masks & np.uint32(remaining)
+      # Leaves missing at most two letters need at least four new letters from both words.
+      useful = np.unique(useful[popcount(useful) >= 4])
+      missing = np.uint32(remaining) & ~(useful[:, np.newaxis] | useful[np.newaxis, :])
+      (a_list, b_list) = np.nonzero(popcount(missing) <= 2)
+      leaves = dict() # word4 useful mask -> {missing mask: word5 useful mask}
+      for (a, b) in zip(a_list, b_list):
+         if a != b:
+            leaves.setdefault(int(useful[a]), dict()).setdefault(int(missing[a, b]), int(useful[b]))
+
+      def best_leaves(word4: int, covered: int):
+         chosen = list()
+         bits = 0
+         for _ in range(branches):
+            (gain, best) = (0, None)
+            for (m, word5) in leaves[word4].items():
+               g = (self.covered(m) & ~(covered | bits)).bit_count()
+               if g > gain:
+                  (gain, best) = (g, (word5, m))
+            if best is None:
+               break
+            chosen.append(best)
+            bits |= self.covered(best[1])
+         return (chosen, bits)
+
+      tree = list()
+      covered = 0
+      for _ in range(branches):
+         (gain, best) = (0, None)
+         for word4 in leaves:
+            (chosen, bits) = best_leaves(word4, covered)
+            g = (bits & ~covered).bit_count()
+            if g > gain:
+               (gain, best) = (g, (word4, chosen, bits))
+         if best is None:
+            break
+         tree.append((best[0], best[1]))
+         covered |= best[2]
+      return (covered, tree)
+
+   def plan(self, branches: int = 2):
+      """ Search every three-word opening from the heterograms for the tree covering the most answers.
+      Returns (bitset of answers covered, opening word masks, tree) as from best_tree().
+      """
+      openings = set()
+      for h in self.heterograms():
+         openings.update(combinations(h, 3))
+      best = (0, None, None)
+      for opening in sorted(openings):
+         (covered, tree) = self.best_tree(opening[0] | opening[1] | opening[2], branches)
+         if covered.bit_count() > best[0].bit_count():
+            best = (covered, opening, tree)
+      return best
+
+   def word_for(self, useful: int, opening: int) -> str:
+      """ A word adding exactly the given new letters to the opening """
+      found = np.flatnonzero((self.word_masks & ~np.uint32(opening)) == useful)
+      if len(found) == 0:
+         raise ValueError(f'No word adds exactly the letters {mask_letters(useful)} to {mask_letters(opening)}.')
+      return self.words[found[0]]
@@ -0,0 +1,167 @@
+#!/usr/bin/python3
+# Copyright (C) 2025 Dez Moleski dez@moleski.com
+# MIT License: All uses allowed with attribution.
+#
+# Parallel scan of the pangram data files in ./data/A through ./data/Z.
+#
+# The per-file work of a script is a function process_file(filepath, context)
+# that returns whatever the script needs from that one file: the text it would
+# have written, or partial counts. scan() runs it on each file in a pool of
+# worker processes and yields the results back in the order of the files, so
+# the script can write the text or merge the counts exactly as it would have
+# done visiting the files one at a time, and its output is byte-identical.
+#
+# The context (word lists and such) is handed to each worker process once, not
+# once per file. process_file has to be a module-level function so the workers
+# can find it; with processes=1 everything runs in this process, with no pool.
+#
+# A ScanCache keeps the result for each file in a JSON file, so cached_scan()
+# only runs process_file again on the files that changed since the last run.
+# An entry is still good while the file's size and mtime are unchanged, or if
+# they changed but the SHA-1 of its contents didn't (e.g. the file was copied).
+#
+import os
+import os.path
+import json
+import hashlib
+from glob import glob
+from collections import deque
+from multiprocessing import Pool
+
+LETTERS = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+
+def data_files(data_dir: str = './data') -> list:
+   """ Paths of all the data files, in the order the scripts visit them: by letter dir, then sorted.
+   The .tmp files left by a script stopped while rewriting a data file aren't data files.
+   """
+   paths = list()
+   for letter in LETTERS:
+      letter_dir = os.path.join(data_dir, letter)
+      if os.path.isdir(letter_dir):
+         paths.extend(sorted([p for p in glob(letter_dir + '/*') if not p.endswith('.tmp')]))
+   return paths
+
+def file_letter(filepath: str) -> str:
+   """ The letter dir a data file is in, for progress messages """
+   return os.path.basename(os.path.dirname(filepath))
+
+def file_range(filepath: str) -> (str,str):
+   """ The (first, last) head words of the data file, named FIRST-LAST, or just WORD for one word """
+   (first, _, last) = os.path.basename(filepath).partition('-')
+   return (first, last or first)
+
+# The per-file function and context, in each worker process.
+worker_function = None
+worker_context = None
+
+def init_worker(process_file, context):
+   global worker_function, worker_context
+   worker_function = process_file
+   worker_context = context
+
+def run_worker(filepath: str):
+   return worker_function(filepath, worker_context)
+
+def scan(process_file, paths: list, context=None, processes: int = None):
+   """ Yield (filepath, process_file(filepath, context)) for each of the paths, in order.
+   Runs on all the cores by default. Only a couple of files per process are ever
+   in flight, so results don't pile up when the caller is slower than the workers.
+   """
+   if processes is None:
+      processes = os.cpu_count() or 1
+   if processes <= 1 or len(paths) <= 1:
+      for filepath in paths:
+         yield (filepath, process_file(filepath, context))
+      return # PUNCH-OUT
+   with Pool(processes, initializer=init_worker, initargs=(process_file, context)) as pool:
+      pending = deque()
+      remaining = iter(paths)
+      for filepath in remaining:
+         pending.append((filepath, pool.apply_async(run_worker, (filepath,))))
+         if len(pending) >= 2 * processes:
+            break
+      while len(pending) > 0:
+         (filepath, result) = pending.popleft()
+         next_path = next(remaining, None)
+         if next_path is not None:
+            pending.append((next_path, pool.apply_async(run_worker, (next_path,))))
+         yield (filepath, result.get())
+
+def processes_arg(argv: list, usage: str):
+   """ Parse an optional '-j N' (number of processes) from the script arguments, exit with the usage if bad.
+   Returns (N or None for all cores, the other arguments).
+   """
+   args = argv[1:]
+   if len(args) >= 1 and args[0] == '-j':
+      if len(args) < 2 or not args[1].isdigit() or int(args[1]) < 1:
+         exit(usage)
+      return (int(args[1]), args[2:])
+   return (None, args)
+
+def file_hash(filepath: str) -> str:
+   h = hashlib.sha1()
+   with open(filepath, 'rb') as f:
+      while True:
+         buf = f.read(1 << 24)
+         if not buf:
+            return h.hexdigest()
+         h.update(buf)
+
+class ScanCache:
+   """ Results of process_file per data file, saved in a JSON file and reused while the file is unchanged.
+   The key identifies everything else the results depend on (the context, and the version of the code);
+   the whole cache is dropped if it was saved with a different key.
+   """
+
+   def __init__(self, cache_path: str, key: str):
+      self.cache_path = cache_path
+      self.key = key
+      self.files = dict() # filepath -> {'size', 'mtime_ns', 'sha1', 'result'}
+      self.n_hits = 0
+      if os.path.isfile(cache_path):
+         with open(cache_path) as f:
+            cache = json.load(f)
+         if cache.get('key') == key:
+            self.files = cache['files']
+
+   def lookup(self, filepath: str, usable=None):
+      """ The cached result for the file if it's unchanged (and usable(result) if given), else None """
+      entry = self.files.get(filepath)
+      if entry is None or (usable is not None and not usable(entry['result'])):
+         return None
+      st = os.stat(filepath)
+      if st.st_size != entry['size']:
+         return None
+      if st.st_mtime_ns != entry['mtime_ns']:
+         if file_hash(filepath) != entry['sha1']:
+            return None
+         entry['mtime_ns'] = st.st_mtime_ns
+      self.n_hits += 1
+      return entry['result']
+
+   def store(self, filepath: str, result):
+      st = os.stat(filepath)
+      self.files[filepath] = {'size': st.st_size, 'mtime_ns': st.st_mtime_ns,
+                              'sha1': file_hash(filepath), 'result': result}
+
+   def save(self, paths: list):
+      """ Write the cache, keeping only the entries for the given paths """
+      files = {filepath: self.files[filepath] for filepath in paths if filepath in self.files}
+      # Write next to the final path and rename, so a half-written cache is never used.
+      with open(self.cache_path + '.tmp', 'w') as f:
+         json.dump({'key': self.key, 'files': files}, f)
+      os.replace(self.cache_path + '.tmp', self.cache_path)
+
+def cached_scan(process_file, paths: list, cache: ScanCache, context=None, processes: int = None, usable=None):
+   """ Like scan(), but results come from the cache for unchanged files, and only the others are processed.
+   Results must be JSON-serializable. The cache is saved once all the paths are done.
+   """
+   cached = [cache.lookup(filepath, usable) for filepath in paths]
+   dirty = [filepath for (filepath, result) in zip(paths, cached) if result is None]
+   results = scan(process_file, dirty, context, processes)
+   for (filepath, result) in zip(paths, cached):
+      if result is None:
+         (_, result) = next(results)
+         cache.store(filepath, result)
+      yield (filepath, result)
+   cache.save(paths)
@@ -0,0 +1,227 @@
+#!/usr/bin/python3
+# Copyright (C) 2025 Dez Moleski dez@moleski.com
+# MIT License: All uses allowed with attribution.
+#
+# The exhaustive pangram search of p2/pangram2.c, in Python with NumPy.
+#
+# The search is the same: the head word w1 goes through the no-anagrams word
+# list in order, and each next word comes after the one before it, so every
+# pangram is found once, as its words in sorted order. A word must remove at
+# least one of the letters still remaining. After k words no more than 5*(6-k)
+# letters can remain, and if exactly that many remain the rest of the words
+# have to be disjoint heterograms, so need a vowel (counting W and Y) each.
+#
+# Instead of testing each next word in turn, each level tests all the words
+# after the current one at once, as NumPy arrays of letter masks (from the
+# compiled lexicon, the same masks genc_all_words.py writes), and only loops
+# over the survivors. The last word must contain all the letters remaining,
+# so the candidates for it are looked up directly, from a table of the words
+# containing each set of remaining letters built up as the search goes.
+#
+# The prune cache works as in pangram2.c: for the letters remaining after
+# each level, it holds CACHE_PANGRAM_FOUND if some pangram was found from
+# there, or the smallest word position from which a search found nothing, so
+# a later search reaching the same letters from that word or after can skip
+# it. It's checked for all the candidates of a level at once, then again for
+# each survivor in turn, since searching the earlier ones updates it.
+#
+# Two more tables, which pangram2.c doesn't have, look ahead to the last two
+# words: for every set of letters, the last position of a word containing all
+# of them, and the last position of the first of a pair of words containing
+# all of them together. A candidate for the 4th or 5th word is skipped if no
+# pair or no single word after it can cover the letters still remaining. That
+# only skips dead ends, so the pangrams found are the same.
+#
+# Results are written in the data file format: the pangram lines of a head
+# word with the anagram sets of their words like [VIGOR|VIRGO], then its
+# "# WORD = n" counts line, including zero counts.
+#
+import sys
+import time
+import numpy as np
+from pangram_lexicon import Lexicon
+
+ALL_LETTERS = (1 << 26) - 1
+VOWELS = sum([1 << (ord(c) - ord('A')) for c in 'AEIOUYW'])
+
+CACHE_NO_INFO = 0xFFFF
+CACHE_PANGRAM_FOUND = 0xFFFE
+
+def superset_max(table):
+   """ Replace each entry of the table indexed by letter mask with the max over the masks containing it """
+   for bit in range(26):
+      v = table.reshape(-1, 2, 1 << bit)
+      np.maximum(v[:, 0, :], v[:, 1, :], out=v[:, 0, :])
+
+class PangramSearch:
+   """ Search for the six-word pangrams of the no-anagrams words of a lexicon """
+
+   def __init__(self, lexicon: Lexicon, use_cache: bool = True):
+      self.lexicon = lexicon
+      words = lexicon.no_anagrams()
+      self.words = words
+      self.positions = {w: i for (i, w) in enumerate(words)}
+      self.lines = [lexicon.format_anagrams(w)[0] for w in words]
+      self.masks = lexicon.records['mask'][[lexicon.word2index[w] for w in words]].astype(np.int32)
+      self.masks_list = self.masks.tolist()
+      self.arange = np.arange(len(words), dtype=np.int32)
+      # Positions of the words containing all the letters of a mask, by mask.
+      self.covers = dict()
+      # Last position of a word, and of the first of a pair of words, containing all the letters of a mask.
+      # Words with the same set of letters are anagrams, so the masks of the no-anagrams words are unique.
+      self.cover1 = np.full(1 << 26, -1, dtype=np.int16)
+      self.cover1[self.masks] = self.arange
+      superset_max(self.cover1)
+      self.cover2 = np.full(1 << 26, -1, dtype=np.int16)
+      for w in range(len(words)-1):
+         # Positions only increase, so the last assignment to a mask is its max.
+         self.cover2[self.masks[w] | self.masks[w+1:]] = w
+      superset_max(self.cover2)
+      # The prune cache of the letters remaining after levels 2 through 5, by level.
+      self.cache = [None] * 6
+      self.cache_views = [None] * 6
+      if use_cache:
+         for level in range(2, 6):
+            self.cache[level] = np.full(1 << 26, CACHE_NO_INFO, dtype=np.uint16)
+            self.cache_views[level] = memoryview(self.cache[level])
+      self.counts = [0] * 7 # candidates searched at each level
+      self.hits = [0] * 7   # candidates skipped by the prune cache at each level
+
+   def __len__(self):
+      return len(self.words)
+
+   def candidates(self, level: int, remaining: int, start: int) -> (list,list):
+      """ The positions from start on of the words that can be the level'th word, given the letters
+      remaining, and the letters remaining after each of them
+      """
+      m = self.masks[start:]
+      after = remaining & ~m
+      n_after = np.bitwise_count(after)
+      bound = 5 * (6 - level)
+      keep = np.flatnonzero(((remaining & m) != 0) & (n_after <= bound))
+      after = after[keep]
+      full = n_after[keep] == bound
+      if full.any():
+         ok = ~full
+         ok[full] = np.bitwise_count(after[full] & VOWELS) >= 6 - level
+         keep = keep[ok]
+         after = after[ok]
+      # The rest are gathers from the big tables, so only for the candidates left.
+      positions = keep + start
+      if level >= 4:
+         cover = self.cover1 if level == 5 else self.cover2
+         ok = cover[after] > positions
+         (positions, after) = (positions[ok], after[ok])
+      self.counts[level] += len(positions)
+      if self.cache[level] is not None:
+         ok = self.cache[level][after] > positions
+         self.hits[level] += len(positions) - int(ok.sum())
+         (positions, after) = (positions[ok], after[ok])
+      return (positions.tolist(), after.tolist())
+
+   def covering(self, remaining: int):
+      """ Positions of the words containing all the remaining letters """
+      c = self.covers.get(remaining)
+      if c is None:
+         c = np.flatnonzero((self.masks & remaining) == remaining)
+         self.covers[remaining] = c
+      return c
+
+   def search_level(self, level: int, remaining: int, start: int, stack: list, found: list) -> bool:
+      """ Search for the level'th word on, from position start, given the words on the stack and the
+      letters remaining. Pangrams found are appended to found, as lists of positions.
+      Returns True if any was found (from here, or from the same letters remaining before).
+      """
+      if level == 6:
+         c = self.covering(remaining)
+         c = c[np.searchsorted(c, start):]
+         self.counts[6] += len(c)
+         for w in c.tolist():
+            found.append(stack + [w])
+         return len(c) > 0 # PUNCH-OUT
+
+      cache = self.cache_views[level]
+      any_found = False
+      (positions, remains) = self.candidates(level, remaining, start)
+      for (w, after) in zip(positions, remains):
+         if cache is not None and cache[after] <= w:
+            self.hits[level] += 1
+            continue
+         stack.append(w)
+         b_found = self.search_level(level+1, after, w+1, stack, found)
+         stack.pop()
+         if cache is None:
+            any_found = any_found or b_found
+         elif b_found or cache[after] == CACHE_PANGRAM_FOUND:
+            # If the level below me found a pangram, then so did the level above me.
+            cache[after] = CACHE_PANGRAM_FOUND
+            any_found = True
+         else:
+            # No pangram found for these letters remaining, from this word forward.
+            cache[after] = w
+      return any_found
+
+   def search_word(self, w1: int) -> list:
+      """ All the pangrams with the word at position w1 as their head word, as lists of positions """
+      self.counts[1] += 1
+      found = list()
+      self.search_level(2, ALL_LETTERS & ~self.masks_list[w1], w1+1, [w1], found)
+      return found
+
+   def format_pangram(self, pangram: list) -> str:
+      return ' '.join([self.lines[w] for w in pangram]) + ' '
+
+   def search(self, first: int = 0, last: int = None, out=sys.stdout, progress=None):
+      """ Search the head words at positions first through last, writing data file lines to out.
+      Returns the number of pangrams found.
+      """
+      if last is None:
+         last = len(self.words) - 1
+      n_total = 0
+      for w1 in range(first, last+1):
+         found = self.search_word(w1)
+         for pangram in found:
+            print(self.format_pangram(pangram), file=out)
+         print(f'# {self.lines[w1]} = {len(found)}', file=out, flush=True)
+         n_total += len(found)
+         if progress is not None:
+            progress(w1, len(found))
+      return n_total
+
+if __name__ == "__main__":
+   args = sys.argv[1:]
+   use_cache = True
+   if len(args) >= 1 and args[0] == '-n':
+      use_cache = False
+      args = args[1:]
+   if len(args) > 2:
+      exit("Usage: pangram_search [-n] [first-word [last-word]]")
+
+   ALL_FILE = "./ALL"
+   print("Loading lexicon of all valid guesses file:", ALL_FILE, file=sys.stderr, flush=True, end=' ')
+   lexicon = Lexicon.open(ALL_FILE)
+   engine = PangramSearch(lexicon, use_cache)
+   print("N no-anagrams =", len(engine), file=sys.stderr, flush=True)
+
+   # The head words to search, by default all of them. Like the data file names,
+   # a single word searches just that word, and FIRST LAST searches the range.
+   first = 0
+   last = len(engine) - 1
+   for (i, word) in enumerate(args):
+      word = word.upper()
+      if word not in engine.positions:
+         exit(f'ERROR: {word} is not in the no-anagrams word list.')
+      if i == 0:
+         first = last = engine.positions[word]
+      else:
+         last = engine.positions[word]
+   if len(args) == 0:
+      last = len(engine) - 1
+
+   t0 = time.monotonic()
+   def progress(w1: int, n_found: int):
+      print(f'{engine.words[w1]} = {n_found} ({time.monotonic() - t0:.1f}s)', file=sys.stderr, flush=True)
+   n_total = engine.search(first, last, sys.stdout, progress)
+   print("PRUNE HITS:", *engine.hits[1:], file=sys.stderr)
+   print("COUNTS:", *engine.counts[1:], file=sys.stderr)
+   print(f'Pangrams found: {n_total:,} in {time.monotonic() - t0:.1f}s', file=sys.stderr, flush=True)
@@ -0,0 +1,332 @@
+#!/usr/bin/python3
+# Copyright (C) 2025 Dez Moleski dez@moleski.com
+# MIT License: All uses allowed with attribution.
+#
+# The query logic of the pangrams shell, split in two so that it can be shared:
+#
+#   PangramData     the word lists and the pangrams store, index and stats,
+#                   loaded once and only read after that
+#   PangramSession  one player's state: the words played so far and the
+#                   pangrams remaining at each step
+#
+# play-pangram.py runs one session and prints the results; pangram-server.py
+# keeps one PangramData resident and runs any number of sessions over it.
+# Results are plain lists, dicts, strings and ints, so they can be sent as JSON.
+# Requests that can't be answered raise ValueError with a message for the user.
+#
+import re
+import threading
+import numpy as np
+from pangram_store import PangramStore, word_indices
+from pangram_index import PangramIndex, subtract
+from pangram_stats import load_stats, build_stats
+from pangram_plan import PangramPlanner, mask_letters
+
+ALPHABET = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+
+class PangramData:
+   """ Word lists, pangrams store, index, stats and planner, shared by all sessions """
+   words: list = None # sorted word strings of the ALL list
+   answers: list = None # sorted solution word strings
+   answer_set: set = None
+   word2index: dict = None
+   store: PangramStore = None
+   index: PangramIndex = None
+   stats: dict = None
+   planner: PangramPlanner = None
+   solution_counts = None # pangrams with each solution, array indexed by word index
+   answer_indices = None # word indices of the solutions, in the order of answers
+
+   def __init__(self):
+      # Guards the things built lazily or rebuilt after loading: the stats, plans and patterns.
+      self.lock = threading.Lock()
+      self.plans = dict() # branches -> plan(), the search takes a few seconds
+      self.patterns = dict() # regular expression -> word indices of the matching solutions
+
+   def set_words(self, words: list, answers: list):
+      self.words = words
+      self.answers = answers
+      self.answer_set = set(answers)
+      self.word2index = word_indices(words)
+      self.answer_indices = np.array([self.word2index[a] for a in answers if a in self.word2index], dtype=np.int64)
+
+   def open_pangrams(self, pangrams_file: str):
+      """ Memory-map the pangrams store and index, converting and indexing on first use """
+      self.store = PangramStore.open(pangrams_file, self.words)
+      self.index = PangramIndex.open(self.store)
+      self.stats = load_stats(self.store, self.answers)
+      # The solution counts of all the pangrams, where every session starts.
+      self.solution_counts = self.store.solution_counts()
+
+   def is_valid(self, word_str: str) -> bool:
+      return word_str in self.word2index
+
+   def is_answer(self, word_str: str) -> bool:
+      return word_str in self.answer_set
+
+   def display(self, word_str: str) -> str:
+      """ The word as the shell shows it, with a '*' if it's a known potential solution """
+      return word_str + '*' if self.is_answer(word_str) else word_str
+
+   def check_valid(self, word_str: str):
+      if not self.is_valid(word_str):
+         raise ValueError(f'{self.display(word_str)} is not Wordleable.')
+
+   def top_counts(self, counts, N: int) -> list:
+      """ The [word, count] pairs of the top N nonzero counts in an array indexed by word index """
+      top = np.argsort(-counts, kind='stable')[0:N]
+      return [[self.words[i-1], int(counts[i])] for i in top if counts[i] > 0]
+
+   def rebuild_stats(self):
+      stats = build_stats(self.store, self.answers)
+      with self.lock:
+         self.stats = stats
+
+   def word_list(self, n_top: int = 50) -> list:
+      """ [word, pangrams, solutions] of the top N words by pangrams, sorted by solutions """
+      l = [[w, n, s] for (w, (n, s)) in self.stats['words'].items() if n > 0]
+      l.sort(key=lambda t: t[1], reverse=True)
+      return sorted(l[0:n_top], key=lambda t: t[2], reverse=True)
+
+   def matching_answers(self, pattern: str):
+      """ Word indices of the solutions fully matching a regular expression, matched once per solution """
+      with self.lock:
+         indices = self.patterns.get(pattern.upper())
+      if indices is None:
+         try:
+            regex = re.compile(pattern.upper())
+         except re.error:
+            raise ValueError(f'pattern {pattern} failed to compile as a regular expression.')
+         indices = np.array([i for i in self.answer_indices if regex.fullmatch(self.words[i-1])], dtype=np.int64)
+         with self.lock:
+            self.patterns[pattern.upper()] = indices
+      return indices
+
+   def get_planner(self) -> PangramPlanner:
+      with self.lock:
+         if self.planner is None:
+            self.planner = PangramPlanner(self.words, self.answers)
+         return self.planner
+
+   def plan(self, branches: int = 2) -> dict:
+      """ The best pangram-win plan (see pangram_plan.py) with the words and solution counts filled in """
+      with self.lock:
+         plan = self.plans.get(branches)
+      if plan is not None:
+         return plan
+      planner = self.get_planner()
+      plan = {'heterograms': len(planner.heterograms()), 'answers': len(self.answers)}
+      (covered, opening, tree) = planner.plan(branches)
+      if opening is None:
+         plan['covered'] = 0
+         plan['opening'] = None
+         plan['tree'] = list()
+      else:
+         plan['covered'] = covered.bit_count()
+         plan['opening'] = sorted([planner.mask_words(m) for m in opening])
+         opening_mask = opening[0] | opening[1] | opening[2]
+         plan['tree'] = list()
+         covered = 0
+         for (word4, leaves) in tree:
+            step5 = list()
+            for (word5, missing) in leaves:
+               bits = planner.covered(missing)
+               step5.append({'word': planner.word_for(word5, opening_mask),
+                             'letters': mask_letters(missing),
+                             'solutions': bits.bit_count(),
+                             'added': (bits & ~covered).bit_count()})
+               covered |= bits
+            plan['tree'].append({'word': planner.word_for(word4, opening_mask), 'step5': step5})
+      with self.lock:
+         self.plans[branches] = plan
+      return plan
+
+class PangramSession:
+   """ The words one player has played, and the pangrams remaining at each step """
+   played_words: list = None # word strings
+   pangrams = None # sorted array of pangram ids
+   pangrams_at_step: list = None
+   solution_counts = None # pangrams remaining with each solution by word index, once a word is played
+   solution_counts_at_step: list = None
+   letters_left: set = None
+   letters_left_list: list = None
+   letters_left_at_step: list = None
+
+   def __init__(self, data: PangramData):
+      self.data = data
+      self.clear()
+
+   def clear(self):
+      self.played_words = list()
+      self.pangrams = np.zeros(0, dtype=np.uint32) # ids of pangrams remaining available to play
+      # History of each step, supports back(). The pangrams at each step are just
+      # sorted id arrays: the first step's is a view into the memory-mapped index, and
+      # each later step's is a subset of the step before, so nothing is copied from the
+      # pangrams store and the history never holds more than the first step's ids again.
+      self.pangrams_at_step = [None] * 6 # self.pangrams at each step
+      self.solution_counts = None
+      self.solution_counts_at_step = [None] * 6 # self.solution_counts at each step
+      self.letters_left_at_step = [None] * 6 # (letters_left, letters_left_list) at each step
+      self.letters_left = set(ALPHABET)
+      self.letters_left_list = list(ALPHABET)
+
+   def n_played(self) -> int:
+      return len(self.played_words)
+
+   def pangrams_remaining(self):
+      """ Return count of the remaining pangrams, or None if nothing is played and the pangrams aren't loaded """
+      if self.n_played() > 0:
+         return len(self.pangrams)
+      if self.data.store is None:
+         return None
+      return len(self.data.store)
+
+   def already_played(self, word_str: str) -> bool:
+      return word_str in self.played_words
+
+   def remaining_ids(self):
+      """ Ids of the remaining pangrams, or None meaning all pangrams when nothing is played yet """
+      if self.n_played() > 0:
+         return self.pangrams
+      return None
+
+   def pangrams_with(self, word_str: str):
+      """ Ids of the remaining pangrams containing the given word """
+      if self.n_played() > 0:
+         return self.data.index.select(self.pangrams, word_str)
+      return self.data.index.postings(word_str)
+
+   def play(self, word_str: str):
+      """ Play a word """
+      # Words given to be played must be in the ALL list, of course.
+      step_index = self.n_played()
+      if step_index == 6:
+         raise ValueError('Only six guesses are allowed!')
+      self.data.check_valid(word_str)
+      if self.already_played(word_str):
+         raise ValueError(f'You already played {self.data.display(word_str)}!')
+      if step_index == 0: # This is the first word played
+         # The first word's posting list is exactly the pangrams containing it.
+         pangrams = self.data.index.postings(word_str)
+      else:
+         # Later words narrow the remaining pangrams by intersecting posting lists.
+         pangrams = self.data.index.select(self.pangrams, word_str)
+      self.solution_counts = self.narrowed_solution_counts(pangrams)
+      self.pangrams = pangrams
+      self.pangrams_at_step[step_index] = self.pangrams
+      self.solution_counts_at_step[step_index] = self.solution_counts
+
+      self.played_words.append(word_str)
+      # Make a new set (don't modify in place) so the earlier steps keep theirs.
+      self.letters_left = self.letters_left - set(word_str)
+      self.letters_left_list = sorted(self.letters_left)
+      self.letters_left_at_step[step_index] = (self.letters_left, self.letters_left_list)
+
+   def remaining_solution_counts(self):
+      """ Count of the remaining pangrams with each solution, as an array indexed by word index """
+      if self.n_played() > 0:
+         return self.solution_counts
+      return self.data.solution_counts
+
+   def narrowed_solution_counts(self, pangrams):
+      """ The solution counts for the given subset of the remaining pangrams """
+      store = self.data.store
+      n_remaining = self.pangrams_remaining()
+      if len(pangrams) <= n_remaining - len(pangrams):
+         return store.solution_counts(pangrams)
+      # Most pangrams remain, so count the ones removed and take them off.
+      return self.remaining_solution_counts() - store.solution_counts(subtract(self.remaining_ids(), pangrams, len(store)))
+
+   def back(self) -> bool:
+      """ Undo the most recent play, return False if no words are played """
+      step_index = self.n_played()
+      if step_index == 0:
+         return False
+      if step_index == 1:
+         # Just clear(), we stepped back to the beginning
+         self.clear()
+      else:
+         prev_step = step_index-1
+         self.played_words = self.played_words[0:prev_step]
+         self.pangrams = self.pangrams_at_step[prev_step-1]
+         self.pangrams_at_step[prev_step] = None
+         self.solution_counts = self.solution_counts_at_step[prev_step-1]
+         self.solution_counts_at_step[prev_step] = None
+         (self.letters_left, self.letters_left_list) = self.letters_left_at_step[prev_step-1]
+         self.letters_left_at_step[prev_step] = None
+      return True
+
+   def status(self) -> dict:
+      return {'pangrams_remaining': self.pangrams_remaining(),
+              'played': [self.data.display(w) for w in self.played_words],
+              'pangrams_by_step': [len(l) if l is not None else None for l in self.pangrams_at_step],
+              'letters_left': self.letters_left_list}
+
+   def common(self, given_words: list = None, N: int = 10) -> dict:
+      """ The most common unplayed words in the remaining pangrams, or:
+      given up to 5 words, the most common unplayed words in the remaining pangrams with each of
+      those words (excluding those words), and their common max and min counts if more than one.
+      """
+      given_words = list() if given_words is None else given_words
+      if len(given_words) > 5:
+         raise ValueError('At most 5 words can be searched for common unplayed words.')
+      for word_str in given_words:
+         self.data.check_valid(word_str)
+      # Ignore words we already played plus the given words, if any
+      skip_indices = [self.data.word2index[w] for w in self.played_words + given_words]
+
+      if len(given_words) == 0:
+         counts = self.data.store.word_counts(self.remaining_ids())
+         counts[skip_indices] = 0
+         return {'top': self.data.top_counts(counts, N)}
+      result = {'given': list()}
+      common_counts = None
+      common_counts_min = None
+      for word_str in given_words:
+         counts = self.data.store.word_counts(self.pangrams_with(word_str))
+         counts[skip_indices] = 0
+         result['given'].append([word_str, self.data.top_counts(counts, N)])
+         # If we're past the first iteration, find the intersection of the counts.
+         if common_counts is None:
+            common_counts = counts
+         else:
+            both = (common_counts > 0) & (counts > 0)
+            common_counts_min = np.where(both, np.minimum(common_counts, counts), 0)
+            common_counts = np.where(both, np.maximum(common_counts, counts), 0)
+      if len(given_words) > 1:
+         result['common_max'] = self.data.top_counts(common_counts, N)
+         result['common_min'] = self.data.top_counts(common_counts_min, N)
+      return result
+
+   def solutions(self, pattern: str = None) -> list:
+      """ [solution, pangrams] of the unique solutions in the remaining pangrams, sorted by solution,
+      optionally only the solutions matching a regular expression.
+      """
+      if pattern is None:
+         indices = self.data.answer_indices
+      else:
+         indices = self.data.matching_answers(pattern)
+      counts = self.remaining_solution_counts()[indices]
+      return [[self.data.words[i-1], int(n)] for (i, n) in zip(indices, counts) if n > 0]
+
+   def think(self, word_str: str) -> dict:
+      """ What is known about a word: whether it's a solution, and how many remaining pangrams have it """
+      self.data.check_valid(word_str)
+      result = {'word': word_str, 'solution': self.data.is_answer(word_str),
+                'played': self.already_played(word_str), 'pangrams': None}
+      if self.n_played() > 0 and not result['played']:
+         result['pangrams'] = self.data.index.count(self.pangrams, word_str)
+      return result
+
+   def pangram_lines(self, word_str: str = None, N: int = 100) -> list:
+      """ All the remaining pangrams if N or fewer remain, or up to N remaining pangrams with the given word """
+      if word_str is None:
+         pangrams_remaining = self.pangrams_remaining()
+         if pangrams_remaining > N:
+            raise ValueError(f'There are {pangrams_remaining} pangrams remaining. '
+                             f'Print only prints when {N} or fewer remain.')
+         ids = self.pangrams
+      else:
+         self.data.check_valid(word_str)
+         ids = self.pangrams_with(word_str)
+      return list(self.data.store.lines(ids[0:N]))
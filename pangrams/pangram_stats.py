@@ -0,0 +1,90 @@
+#!/usr/bin/python3
+# Copyright (C) 2025 Dez Moleski dez@moleski.com
+# MIT License: All uses allowed with attribution.
+#
+# Per-word statistics of the solution pangrams, built in a single pass over
+# the binary pangrams store (see pangram_store.py).
+#
+# For every valid guess we count the pangrams containing that word, and the
+# number of distinct solutions left in those pangrams, i.e. how many unique
+# solutions remain possible if the word is played first. The results are kept
+# in a JSON sidecar next to the pangrams file, SOLUTION-PANGRAMS.stats.json:
+#
+#   {"n_pangrams": N, "words": {"WAQFS": [pangrams, solutions], ...}}
+#
+import sys
+import os
+import os.path
+import json
+import numpy as np
+from pangram_store import PangramStore, store_path, word_indices, SLOT_BITS
+
+def stats_path(pangrams_file: str) -> str:
+   return pangrams_file + '.stats.json'
+
+def stats_are_current(pangrams_file: str) -> bool:
+   """ True if the stats sidecar exists and is newer than the pangrams store """
+   path = stats_path(pangrams_file)
+   return os.path.isfile(path) and os.path.getmtime(path) >= os.path.getmtime(store_path(pangrams_file))
+
+def build_stats(store: PangramStore, answers: list) -> dict:
+   """ Count pangrams and distinct solutions per word in one pass, and write the sidecar """
+   n_words = len(store.words)
+   word2index = word_indices(store.words)
+
+   # Each solution gets a column in a words x solutions table of which solutions
+   # appear starred in some pangram together with which words.
+   solution_indices = [word2index[a] for a in answers if a in word2index]
+   column = np.full(n_words+1, -1, dtype=np.int32)
+   column[solution_indices] = np.arange(len(solution_indices), dtype=np.int32)
+   seen = np.zeros((n_words+1, len(solution_indices)), dtype=bool)
+   pangram_counts = np.zeros(n_words+1, dtype=np.int64)
+
+   print(f'Counting words and solutions in {len(store)} pangrams', end='', flush=True, file=sys.stderr)
+   for (words, stars) in store.chunks():
+      pangram_counts += np.bincount(words.ravel(), minlength=n_words+1)
+      starred = (stars[:, np.newaxis] & SLOT_BITS) != 0
+      for j in range(6):
+         # Pangrams with a solution in slot j: mark that solution for all six words.
+         rows = starred[:, j]
+         if not rows.any():
+            continue
+         cols = column[words[rows, j]]
+         if (cols < 0).any():
+            exit(f'ERROR: {store.pangrams_file} has a starred word that is not in the answers list.')
+         for i in range(6):
+            seen[words[rows, i], cols] = True
+      print('.', end='', flush=True, file=sys.stderr)
+   print('', file=sys.stderr, flush=True)
+   solution_counts = seen.sum(axis=1)
+
+   stats = dict()
+   stats['n_pangrams'] = len(store)
+   stats['words'] = {w: [int(pangram_counts[i]), int(solution_counts[i])] for (w, i) in word2index.items()}
+   path = stats_path(store.pangrams_file)
+   with open(path + '.tmp', 'w') as f:
+      json.dump(stats, f)
+   os.replace(path + '.tmp', path)
+   return stats
+
+def load_stats(store: PangramStore, answers: list) -> dict:
+   """ Load the stats sidecar for the given pangrams store, (re)building it first if needed """
+   if not stats_are_current(store.pangrams_file):
+      return build_stats(store, answers)
+   with open(stats_path(store.pangrams_file)) as f:
+      return json.load(f)
+
+if __name__ == "__main__":
+   if len(sys.argv) != 1:
+      exit("Usage: pangram_stats")
+
+   from pangram_lexicon import Lexicon
+   ALL_FILE = "./ALL"
+   ANSWERS_FILE = "./ANSWERS"
+   ALL_PANGRAMS = "./SOLUTION-PANGRAMS"
+   print("Loading lexicon of all valid guesses file:", ALL_FILE, file=sys.stderr, flush=True, end=' ')
+   lexicon = Lexicon.open(ALL_FILE, ANSWERS_FILE)
+   answers = lexicon.answers()
+   print("N =", len(lexicon), "solutions =", len(answers), file=sys.stderr, flush=True)
+   store = PangramStore.open(ALL_PANGRAMS, lexicon.words)
+   build_stats(store, answers)
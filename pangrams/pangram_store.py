@@ -0,0 +1,176 @@
+#!/usr/bin/python3
+# Copyright (C) 2025 Dez Moleski dez@moleski.com
+# MIT License: All uses allowed with attribution.
+#
+# Compact binary store of the SOLUTION-PANGRAMS file.
+#
+# Each pangram is a fixed-width 13-byte record: six uint16 word indices, in the
+# same sorted order as the words on the text line, plus one flag byte with bit i
+# set when word i is a known potential solution (printed with a trailing '*' in
+# the text). Word indices are numbered the way genc_all_words.py numbers them in
+# word2index: the first word of the sorted ALL list has index one.
+#
+# The store is written as SOLUTION-PANGRAMS.npy next to the text file, so any
+# script can memory-map it with np.load(path, mmap_mode='r') and slice records
+# without parsing or copying. Record number i is the pangram on line i (from 0).
+#
+from array import array
+import sys
+import os
+import os.path
+import numpy as np
+
+RECORD = np.dtype([('words', '<u2', (6,)), ('stars', 'u1')])
+
+# Lines converted, or records counted, per chunk.
+CHUNK_SIZE = 1 << 20
+
+# Flag bit for each of the six word slots of a record.
+SLOT_BITS = np.array([1, 2, 4, 8, 16, 32], dtype=np.uint8)
+
+# While converting, a solution token like b'FJORD*' maps to its word index
+# with this bit set. There are far fewer than 32768 words.
+STAR_BIT = 0x8000
+
+def word_indices(words: list) -> dict:
+   """ Map each word string of the sorted words list to its index, counting from one """
+   word2index = dict()
+   index: int = 1
+   for w in words:
+      word2index[w] = index
+      index += 1
+   return word2index
+
+def store_path(pangrams_file: str) -> str:
+   return pangrams_file + '.npy'
+
+def store_is_current(pangrams_file: str) -> bool:
+   """ True if the store exists and is newer than the pangrams text file """
+   path = store_path(pangrams_file)
+   return os.path.isfile(path) and os.path.getmtime(path) >= os.path.getmtime(pangrams_file)
+
+def count_lines(path: str) -> int:
+   n = 0
+   with open(path, 'rb') as f:
+      while True:
+         buf = f.read(1 << 24)
+         if not buf:
+            return n
+         n += buf.count(b'\n')
+
+def build_store(pangrams_file: str, words: list):
+   """ Convert the pangrams text file into the binary store, in one pass over the text """
+   path = store_path(pangrams_file)
+   token2index = dict()
+   for (w, index) in word_indices(words).items():
+      token2index[w.encode()] = index
+      token2index[w.encode() + b'*'] = index | STAR_BIT
+
+   n_pangrams = count_lines(pangrams_file)
+   print(f'Converting {n_pangrams} pangrams from {pangrams_file}', end='', flush=True, file=sys.stderr)
+   records = np.lib.format.open_memmap(path + '.tmp', mode='w+', dtype=RECORD, shape=(n_pangrams,))
+   n_lines = 0
+
+   def flush_chunk(chunk):
+      m = np.frombuffer(chunk, dtype=np.uint16).reshape(-1, 6)
+      start = n_lines - len(m)
+      records['words'][start:n_lines] = m & (STAR_BIT - 1)
+      records['stars'][start:n_lines] = ((m >> 15).astype(np.uint8) * SLOT_BITS).sum(axis=1)
+      print('.', end='', flush=True, file=sys.stderr)
+
+   with open(pangrams_file, 'rb') as f:
+      chunk = array('H')
+      for line in f:
+         tokens = line.split()
+         if len(tokens) != 6:
+            exit(f'ERROR: line {n_lines+1} of {pangrams_file} is not six words: {line}')
+         chunk.extend([token2index[t] for t in tokens])
+         n_lines += 1
+         if n_lines % CHUNK_SIZE == 0:
+            flush_chunk(chunk)
+            chunk = array('H')
+      if len(chunk) > 0:
+         flush_chunk(chunk)
+   print('', file=sys.stderr, flush=True)
+   records.flush()
+   del records
+   os.replace(path + '.tmp', path)
+
+class PangramStore:
+   """ Memory-mapped fixed-width records of the solution pangrams """
+
+   def __init__(self, pangrams_file: str, words: list):
+      self.pangrams_file = pangrams_file
+      self.words = words # sorted word strings, word index i is words[i-1]
+      self.records = np.load(store_path(pangrams_file), mmap_mode='r')
+
+   @classmethod
+   def open(cls, pangrams_file: str, words: list):
+      """ Open the store for the given pangrams file, converting the text first if needed """
+      if not store_is_current(pangrams_file):
+         build_store(pangrams_file, words)
+      return cls(pangrams_file, words)
+
+   def __len__(self):
+      return len(self.records)
+
+   def word_matrix(self):
+      """ Pangrams x 6 view of the word indices (no copy) """
+      return self.records['words']
+
+   def stars(self):
+      """ Per-pangram solution flag bits (no copy) """
+      return self.records['stars']
+
+   def chunks(self, ids=None):
+      """ Yield (words, stars) arrays for the given pangram ids, or all pangrams if None, a chunk at a time """
+      words = self.word_matrix()
+      stars = self.stars()
+      n = len(self) if ids is None else len(ids)
+      for start in range(0, n, CHUNK_SIZE):
+         if ids is None:
+            yield (words[start:start+CHUNK_SIZE], stars[start:start+CHUNK_SIZE])
+         else:
+            chunk_ids = ids[start:start+CHUNK_SIZE]
+            yield (words[chunk_ids], stars[chunk_ids])
+
+   def word_counts(self, ids=None):
+      """ Count of the given pangrams containing each word, as an array indexed by word index """
+      counts = np.zeros(len(self.words)+1, dtype=np.int64)
+      for (words, _) in self.chunks(ids):
+         counts += np.bincount(words.ravel(), minlength=len(counts))
+      return counts
+
+   def solution_counts(self, ids=None):
+      """ Count of the given pangrams containing each word as a solution, indexed by word index """
+      counts = np.zeros(len(self.words)+1, dtype=np.int64)
+      for (words, stars) in self.chunks(ids):
+         starred = (stars[:, np.newaxis] & SLOT_BITS) != 0
+         counts += np.bincount(words[starred], minlength=len(counts))
+      return counts
+
+   def line(self, pangram_id) -> str:
+      """ Format a pangram the way it appears in the SOLUTION-PANGRAMS text """
+      record = self.records[pangram_id]
+      stars = int(record['stars'])
+      line_words = list()
+      for (slot, index) in enumerate(record['words']):
+         word = self.words[index-1]
+         line_words.append(word + '*' if stars & (1 << slot) else word)
+      return ' '.join(line_words)
+
+   def lines(self, ids):
+      for pangram_id in ids:
+         yield self.line(pangram_id)
+
+if __name__ == "__main__":
+   if len(sys.argv) != 1:
+      exit("Usage: pangram_store")
+
+   from pangram_lexicon import Lexicon
+   ALL_FILE = "./ALL"
+   ALL_PANGRAMS = "./SOLUTION-PANGRAMS"
+   print("Loading lexicon of all valid guesses file:", ALL_FILE, file=sys.stderr, flush=True, end=' ')
+   lexicon = Lexicon.open(ALL_FILE)
+   print("N =", len(lexicon), file=sys.stderr, flush=True)
+   build_store(ALL_PANGRAMS, lexicon.words)
@@ -7,121 +7,73 @@ import sys
 from copy import deepcopy
 from glob import glob
 from operator import itemgetter
-from itertools import islice
+from itertools import islice, product
 import datetime
 import json
 import os.path
 import re
+from pangram_lexicon import Lexicon
+from pangram_scan import scan, data_files, file_letter, processes_arg
 
-def expand_pangrams(expanded: list, singles: list, anagram_sets: list, answers: WordList):
-   # We recurse until we reach depth == 6 at which point we can just append the
-   # fully expanded anagram represented by the singles into the expanded list.
-   # This could be written to stop the recursion when anagram_sets is empty, too.
-   depth = len(singles)
-   if depth == 6:
-      singles.sort()
-      expanded.append(singles)
-   else:
-      try:
-         next_anagram_sets = anagram_sets.copy() # need our own copy at each depth
-         anagrams_list = next_anagram_sets.pop()
-         for item in anagrams_list:
-            w = Word(item)
-            if answers.contains_word(w):
-               w.star(True) # Marks Word to format its repr with trailing '*'
-            next_singles = singles.copy()
-            next_singles.append(w)
-            expand_pangrams(expanded, next_singles, next_anagram_sets, answers)
-      except:
-         print('ERROR: singles, depth:', singles, depth, file=sys.stderr)
-         print('ERROR: anagram_sets:', anagram_sets, file=sys.stderr)
+def base_pangrams(filepath: str):
+   """ Yield each pangram line of a data file as a list of items, skipping the summary lines """
+   with open(filepath, 'r') as f:
+      # Anagrams within the line are like: '[VIGOR|VIRGO]'
+      for line in f:
+         line_list = line.split()
+         if line_list[0] != '#':
+            yield line_list
+
+def expand_pangrams(line_list: list, display: dict):
+   """ Yield each pangram a line expands to, as an output text line, if any of them contain a solution.
+   Each item becomes the list of its words as displayed (solutions with a trailing '*'), so the
+   expansion is just the cartesian product of those lists, taking the last anagram set outermost.
+   """
+   choices = [[display.get(w, w) for w in item.strip('[]').split('|')] for item in line_list]
+   # Check whether any of the pangrams this line expands to contain a solution
+   # (amounts to whether any of the words or an anagram of a word are an answer).
+   # These are the only ones we're interested in.
+   if not any([w[-1] == '*' for words in choices for w in words]):
+      return
+   for pangram in product(*reversed(choices)):
+      yield ' '.join(sorted(pangram)) + ' \n'
+
+def expand_file(filepath: str, display: dict) -> str:
+   """ The text of all the solution pangrams expanded from one data file """
+   return ''.join([pangram for line_list in base_pangrams(filepath)
+                           for pangram in expand_pangrams(line_list, display)])
 
 if __name__ == "__main__":
-   if len(sys.argv) != 1:
-      exit("Usage: solution-pangrams")
+   USAGE = "Usage: solution-pangrams [-j processes]"
+   (processes, args) = processes_arg(sys.argv, USAGE)
+   if len(args) != 0:
+      exit(USAGE)
    
-   # Read ALL GUESSES file
+   # Load the lexicon of the ALL GUESSES file, with the solutions from the ANSWERS file flagged
    ALL_FILE = "./ALL"
-   print("Reading all valid guesses file:", ALL_FILE, file=sys.stderr, flush=True, end=' ')
-   valid_guesses = WordList.from_file(ALL_FILE)
-   valid_guesses.sort()
-   print("N =", len(valid_guesses), file=sys.stderr, flush=True)
-   
-   # Read ANSWERS
    ANSWERS_FILE = "./ANSWERS"
-   print("Reading answers file:", ANSWERS_FILE, file=sys.stderr, flush=True, end=' ')
-   answers = WordList.from_file(ANSWERS_FILE)
-   answers.sort()
-   print("N =", len(answers), file=sys.stderr, flush=True)
+   print("Loading lexicon of all valid guesses file:", ALL_FILE, file=sys.stderr, flush=True, end=' ')
+   lexicon = Lexicon.open(ALL_FILE, ANSWERS_FILE)
+   answers = lexicon.answers()
+   print("N =", len(lexicon), "solutions =", len(answers), file=sys.stderr, flush=True)
 
-   # Visit each pangram data file
+   # Every word string as it's written, solutions with a trailing '*', made once and shared
+   # by every pangram line it's in.
+   display = dict()
+   for w in lexicon.words:
+      display[w] = w
+   for w in answers:
+      display[w] = w + '*'
+
+   # Expand the data files in parallel, writing each file's pangrams in one block, in file order.
    print("Scanning data files: ", file=sys.stderr, flush=True, end='')
-   all_pgrams = list()
    total_pangrams = 0
-   total_pangrams_containing_answers = 0
-   word_count = dict()
-   
-   for letter in ALPHABET_LIST:
-      print(letter, file=sys.stderr, flush=True, end=' ')
-      datadir = f"./data/{letter}/"
-      if os.path.isdir(datadir):
-         # Visit each file in the data dir
-         paths = sorted(glob(datadir+'*'))
-         for filepath in paths:
-            with open(filepath, 'r') as f:
-               # Read each line and split first into line_list array.
-               # Anagrams within the line are like: '[VIGOR|VIRGO]'
-               for line in f:
-                  line_list = line.split()
-                  if line_list[0] != '#': # Just skip the summary lines, we don't need them
-                     all_pgrams.append(line_list) # unexpanded anagrams here
-                     
-                     # Visit each word or anagram set in the line, and
-                     # accumulate the words into our all_words WordList.
-                     # Also count how many pangrams are generated by expanding any anagrams.
-                     # The trickiest part is counting for each word how many pangrams that
-                     # word appears in. This is easy for the single word items, but for
-                     # words that are part of an anagram set it's not as straightforward
-                     # unless there's only one anagram set in the pangram.
-                     single_words_in_this_pangram = list()
-                     anagram_sets_in_this_pangram = list()
-                     for item in line_list:
-                        # If it's five letters, this item is a single word
-                        if len(item) == 5:
-                           single_words_in_this_pangram.append(item)
-                        else:
-                           # It's anagrams like '[VIGOR|VIRGO]', so trim and split it into words.
-                           stripped = item.strip('[]')
-                           words = stripped.split('|')
-                           anagram_sets_in_this_pangram.append(words)
-
-                     # Check whether any of the pangrams this line expands to contain
-                     # a solution (amounts to whether any of the words or an anagram
-                     # of a word are an answer). These are the only ones we're interested in.
-                     this_pangram_contains_answers = False
-                     for item in single_words_in_this_pangram:
-                        if answers.contains(item):
-                           this_pangram_contains_answers = True
-                           break
-                     if not this_pangram_contains_answers:
-                        for s in anagram_sets_in_this_pangram:
-                           for w in s:
-                              if not this_pangram_contains_answers and answers.contains(w):
-                                 this_pangram_contains_answers = True
-                     
-                     if this_pangram_contains_answers:
-                        single_words = list() # a list of the single word strings as Words
-                        for item in single_words_in_this_pangram:
-                           w = Word(item)
-                           if answers.contains_word(w):
-                              w.star(True) # Marks Word to format its repr with trailing '*'
-                           single_words.append(w)
-                        # This recursive function builds expanded_pangrams into a list of lists of Words.
-                        expanded_pangrams = list()
-                        expand_pangrams(expanded_pangrams, single_words, anagram_sets_in_this_pangram, answers)
-                        total_pangrams += len(expanded_pangrams)
-                        for e in expanded_pangrams:
-                           for w in e:
-                              print(w, end=' ')
-                           print()
-                        
+   letter = None
+   for (filepath, text) in scan(expand_file, data_files(), display, processes):
+      if file_letter(filepath) != letter:
+         letter = file_letter(filepath)
+         print(letter, file=sys.stderr, flush=True, end=' ')
+      sys.stdout.write(text)
+      total_pangrams += text.count('\n')
+   sys.stdout.flush()
+   print("N =", total_pangrams, file=sys.stderr, flush=True)